@@ -15,8 +15,10 @@ import numpy as np
 import geopandas as gp
 import pandas as pd
 import fiona
+from georasters import GeoRaster
 
 from beatbox.vector import Vector, _local_rebuild_crs
+from beatbox.raster import Raster
 from beatbox.do import Backend, EE, Local, Do
 
 from copy import copy
@@ -239,9 +241,9 @@ def _guess_backend(obj=None):
     """
     if obj is None:
         return None
-    elif isinstance(obj, "Raster") or isinstance(obj, "Vector"):
+    elif isinstance(obj, (Raster, Vector)):
         return obj.backend
-    elif isinstance(obj, "GeoRaster") or isinstance(obj, "GeoDataFrame"):
+    elif isinstance(obj, (GeoRaster, gp.GeoDataFrame)):
         return Backend._backend_code["local"]
     else:
         return "unknown"
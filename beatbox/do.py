@@ -9,12 +9,30 @@ __maintainer__ = "Kyle Taylor"
 __email__ = "kyle.taylor@pljv.org"
 __status__ = "Testing"
 
+import functools
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
+def _import_ee():
+    """
+    Import and initialize the Earth Engine API the first time somebody
+    actually needs it -- ee.Initialize() can block on the network, so we
+    don't pay for it at import. Failures aren't cached, so a later call
+    can retry.
+    """
+    try:
+        import ee
+        ee.Initialize()
+    except Exception:
+        raise ImportError("Failed to load the Earth Engine API. "
+                          "Check your installation.")
+    return ee
+
+
 class Backend(object):
     """
     Default backend interface
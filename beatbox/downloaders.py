@@ -91,9 +91,10 @@ class HttpDownload(object):
         # dump HTTP server response as xml text
         self._soup = bs(self._html.text, "lxml")
         # iterate over each row looking for an href matching our
-        # re search pattern
-        for i, a in enumerate(self._soup.findAll("a")):
-            if re.search(string=str(a), pattern="href.*." + _pattern):
+        # re search pattern (compiled once, not once per row)
+        _re_pattern = re.compile("href.*." + _pattern)
+        for a in self._soup.findAll("a"):
+            if _re_pattern.search(str(a)):
                 return True
         # default action if we didn't find our re search string
         return False
@@ -138,11 +139,14 @@ class HttpDownload(object):
                 _re_search_str = self._re_pattern
         # iterate over our soup and store matching href's
         # in the files list
-        for i, a in enumerate(self._soup.findAll("a")):
-            if re.search(string=str(a), pattern=_re_search_str):
+        _re_search = re.compile(_re_search_str)
+        for a in self._soup.findAll("a"):
+            if _re_search.search(str(a)):
                 self._files.append(
                     # by default, use the filename specified by our a hrefs
-                    str(self._soup.select("a")[i].attrs['href'])
+                    # (findAll and select return the same anchors, so
+                    # don't re-select every anchor for each match)
+                    str(a.attrs['href'])
                 )
         if self._files is None:
             raise ValueError("could not parse any target files from the URL "
@@ -11,14 +11,34 @@ __status__ = "Testing"
 
 import os
 import re
+import hashlib
+import inspect
+import tempfile
+import functools
 import numpy as np
 import logging
 
-from scipy import ndimage
+from concurrent.futures import ThreadPoolExecutor
+from scipy import ndimage, signal
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_DEFAULT_STRIP_BYTES = 64 * 1024 ** 2  # rows we read per pass in filter_file
+_DEFAULT_TILE_BYTES = 4 * 1024 ** 2  # rows we filter at once in filter_file
+_FFT_MIN_SIZE = 51  # footprints at least this wide are summed by FFT
+# filter_file's (disc_caching=True) reclass caches, and how many we keep
+_RECLASS_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'beatbox_reclass')
+_RECLASS_CACHE_MAX_FILES = 16
+
+# Numba is optional -- we use it for our window sum kernel when it's around
+try:
+    from numba import njit, prange, get_num_threads
+    from numba.extending import is_jitted
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
 def gen_circular_array(nPixels=None):
     """ make a 2-d array for buffering. It represents a circle of
     radius buffsize pixels, with 1 inside the circle, and zero outside.
@@ -35,22 +55,374 @@ def _dict_to_mwindow_filename(key=None, window_size=None):
     """ quick kludging to generate a filename from key + window size """
     return str(key)+"_"+str(window_size)+"x"+str(window_size)
 
+@functools.lru_cache(maxsize=64)
+def _circular_footprint(size=None):
+    """ our (cached, read-only) circular footprint for a size= window, so
+    that every tile and strip we filter shares one copy """
+    _footprint = np.array(gen_circular_array(nPixels=size // 2)) \
+        if size > 1 else np.ones((1, 1), dtype=np.uint8)
+    _footprint.flags.writeable = False
+    return _footprint
+
+def _footprint_runs(footprint=None):
+    """ break a footprint into (row, first col, last col + 1) runs of
+    contiguous non-zero cells -- one run per row for a circle
+    """
+    _footprint = np.asarray(footprint, dtype=bool)
+    return _cached_footprint_runs(_footprint.shape, _footprint.tobytes())
+
+@functools.lru_cache(maxsize=64)
+def _cached_footprint_runs(shape=None, mask=None):
+    """ _footprint_runs, keyed on a footprint's shape and bytes """
+    _runs = []
+    for i, row in enumerate(
+            np.frombuffer(mask, dtype=bool).reshape(shape)):
+        _cols = np.flatnonzero(row)
+        if not len(_cols):
+            continue
+        # split on gaps, in case someone hands us a ragged footprint
+        _breaks = np.flatnonzero(np.diff(_cols) > 1)
+        for start, stop in zip(np.r_[0, _breaks + 1],
+                               np.r_[_breaks, len(_cols) - 1]):
+            _runs.append((i, _cols[start], _cols[stop] + 1))
+    _runs = np.array(_runs, dtype=np.int64).reshape(-1, 3)
+    _runs.flags.writeable = False
+    return _runs
+
+def _window_prefix(image=None, pad=None, power=1):
+    """ row-wise prefix sums of image**power, reflected out by pad= cells
+    on every side (like ndimage's 'reflect' mode). These only depend on
+    the image, so one set can answer window sums for any footprint no
+    larger than 2*pad+1 cells across
+    """
+    _acc = np.int64 if np.issubdtype(image.dtype, np.integer) \
+        else np.float64
+    if _HAVE_NUMBA and np.asarray(image).size:
+        # one fused pass -- no upcast, powered, or padded copies of image
+        _prefix = np.empty((image.shape[0] + 2 * pad,
+                            image.shape[1] + 2 * pad + 1), dtype=_acc)
+        _numba_window_prefix(np.asarray(image), pad, power, _prefix)
+        return _prefix
+    # ndimage's 'reflect' mode is numpy's 'symmetric'
+    _padded = np.pad(np.asarray(image, dtype=_acc) ** power, pad,
+                     mode='symmetric')
+    # prefix[y, x] is the sum of padded[y, :x]
+    _prefix = np.zeros((_padded.shape[0], _padded.shape[1] + 1), dtype=_acc)
+    np.cumsum(_padded, axis=1, dtype=_acc, out=_prefix[:, 1:])
+    return _prefix
+
+def _window_sum(image=None, footprint=None, prefix=None, pad=None,
+                power=1):
+    """ sum image**power values under a footprint centered on each cell
+    (like ndimage.correlate with mode='reflect'), using row-wise prefix
+    sums (of image**power) so that each footprint row costs O(1) rather
+    than O(width). Very large footprints are summed by FFT instead.
+    """
+    if min(footprint.shape) >= _FFT_MIN_SIZE:
+        return _fft_window_sum(image, footprint, power)
+    if prefix is None:
+        pad = max(footprint.shape)
+        prefix = _window_prefix(image, pad, power)
+    _rows, _cols = footprint.shape
+    if _rows > 2 and footprint.all():
+        return _rectangle_window_sum(prefix, image.shape, _rows, _cols,
+                                     pad)
+    # shift our runs so that they index into our prefix's padding
+    _runs = _footprint_runs(footprint) + \
+        np.array([pad - _rows // 2, pad - _cols // 2, pad - _cols // 2])
+    if _HAVE_NUMBA:
+        return _numba_window_sum(prefix, _runs, image.shape[0],
+                                 image.shape[1])
+    _result = np.zeros(image.shape, dtype=prefix.dtype)
+    _n_rows, _n_cols = image.shape
+    for row, start, stop in _runs:
+        _result += prefix[row:row + _n_rows, stop:stop + _n_cols]
+        _result -= prefix[row:row + _n_rows, start:start + _n_cols]
+    return _result
+
+def _rectangle_window_sum(prefix=None, shape=None, rows=None, cols=None,
+                          pad=None):
+    """ sum a full rows x cols rectangle around every cell with four corner
+    lookups into a summed-area table -- i.e., the column-wise cumsum of
+    our row-wise prefix sums -- rather than one lookup pair per row """
+    _sat = np.zeros((prefix.shape[0] + 1, prefix.shape[1]),
+                    dtype=prefix.dtype)
+    np.cumsum(prefix, axis=0, out=_sat[1:])
+    _n_rows, _n_cols = shape
+    _top, _left = pad - rows // 2, pad - cols // 2
+    _bottom, _right = _top + rows, _left + cols
+    return _sat[_bottom:_bottom + _n_rows, _right:_right + _n_cols] - \
+        _sat[_top:_top + _n_rows, _right:_right + _n_cols] - \
+        _sat[_bottom:_bottom + _n_rows, _left:_left + _n_cols] + \
+        _sat[_top:_top + _n_rows, _left:_left + _n_cols]
+
+def _fft_window_sum(image=None, footprint=None, power=1):
+    """ _window_sum by FFT convolution, which costs the same however large
+    our footprint is -- rather than one prefix lookup per footprint row
+    """
+    _rows, _cols = footprint.shape
+    _padded = np.pad(
+        np.asarray(image, dtype=np.float64) ** power,
+        ((_rows // 2, _rows - 1 - _rows // 2),
+         (_cols // 2, _cols - 1 - _cols // 2)),
+        mode='symmetric'
+    )
+    # flip our footprint, so that we correlate rather than convolve
+    _result = signal.fftconvolve(
+        _padded, np.asarray(footprint, dtype=np.float64)[::-1, ::-1],
+        mode='valid'
+    )
+    if np.issubdtype(image.dtype, np.integer):
+        # integer sums are exact everywhere else -- keep them that way
+        return np.rint(_result).astype(np.int64)
+    return _result
+
+def _window_reduce(image=None, footprint=None, function=None,
+                   prefixes=None, pad=None):
+    """ sum, mean, or standard deviation under a footprint from our
+    prefix sums of image (and image**2, for np.std)
+    """
+    _sum = _window_sum(image, footprint, prefixes[0], pad)
+    if function == sum or function == np.sum:
+        return _sum
+    _n = np.count_nonzero(footprint)
+    if function == np.mean:
+        return _sum / _n
+    # sd = sqrt(E[x^2] - E[x]^2)
+    _squares = _window_sum(image, footprint, prefixes[1], pad, power=2)
+    return np.sqrt(np.clip(_squares / _n - (_sum / _n) ** 2, 0, None))
+
+def _takes_axis(function=None):
+    """ does function= have an axis= parameter (i.e., can we hand it
+    _strided_window_reduce)? Builtins and other callables that don't
+    expose a signature are assumed not to. """
+    try:
+        return 'axis' in inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+
+def _strided_window_reduce(image=None, footprint=None, function=None,
+                           max_bytes=_DEFAULT_STRIP_BYTES):
+    """ apply a numpy-style reduction that takes axis= (e.g., np.var,
+    np.ptp) to every footprint window at once through a strided view of
+    our (reflect-padded) image, rather than calling back into python for
+    every cell like generic_filter. We gather max_bytes of windows at a
+    time. Check function= with _takes_axis() first.
+    """
+    _mask = np.asarray(footprint, dtype=bool)
+    _rows, _cols = _mask.shape
+    _padded = np.pad(
+        image,
+        ((_rows // 2, _rows - 1 - _rows // 2),
+         (_cols // 2, _cols - 1 - _cols // 2)),
+        mode='symmetric'
+    )
+    _windows = np.lib.stride_tricks.sliding_window_view(_padded, _mask.shape)
+    _chunk_rows = max(
+        1, max_bytes // (image.shape[1] * _mask.sum() * image.itemsize))
+    _result = None
+    for _row in range(0, image.shape[0], _chunk_rows):
+        # (rows, cols, cells under our footprint)
+        _values = np.asarray(function(
+            _windows[_row:_row + _chunk_rows][..., _mask], axis=-1))
+        if _result is None:
+            _result = np.empty(image.shape, dtype=_values.dtype)
+        _result[_row:_row + _chunk_rows] = _values
+    return _result
+
+def _window_prefixes(image=None, function=None, pad=None):
+    """ the prefix sums _window_reduce needs for function= """
+    _prefixes = [_window_prefix(image, pad)]
+    if function == np.std:
+        _prefixes.append(_window_prefix(image, pad, power=2))
+    return _prefixes
+
+if _HAVE_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _numba_window_sum(prefix, runs, n_rows, n_cols):
+        """ numba version of our prefix-sum window loop in _window_sum """
+        out = np.zeros((n_rows, n_cols), dtype=prefix.dtype)
+        for y in prange(n_rows):
+            for k in range(runs.shape[0]):
+                row = y + runs[k, 0]
+                start = runs[k, 1]
+                stop = runs[k, 2]
+                for x in range(n_cols):
+                    out[y, x] += prefix[row, x + stop] - prefix[row, x + start]
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _numba_window_prefix(image, pad, power, out):
+        """ numba version of _window_prefix that reflects, raises, and
+        accumulates each padded row in one pass, straight into out """
+        n_rows, n_cols = image.shape
+        for y in prange(out.shape[0]):
+            # ndimage's 'reflect' (numpy's 'symmetric') -- the image and
+            # its mirror image repeat every 2n cells
+            row = (y - pad) % (2 * n_rows)
+            if row >= n_rows:
+                row = 2 * n_rows - 1 - row
+            acc = out.dtype.type(0)
+            out[y, 0] = acc
+            for x in range(out.shape[1] - 1):
+                col = (x - pad) % (2 * n_cols)
+                if col >= n_cols:
+                    col = 2 * n_cols - 1 - col
+                value = out.dtype.type(image[row, col])
+                if power == 2:
+                    value = value * value
+                acc += value
+                out[y, x + 1] = acc
+
+    @njit(parallel=True)
+    def _numba_window_apply(padded, dy, dx, n_rows, n_cols, function):
+        """ apply a jitted reduction to the cells at (dy, dx) offsets
+        around every cell of padded, one row of windows per thread """
+        out = np.empty((n_rows, n_cols), dtype=np.float64)
+        for y in prange(n_rows):
+            buffer = np.empty(dy.shape[0], dtype=padded.dtype)
+            for x in range(n_cols):
+                for i in range(dy.shape[0]):
+                    buffer[i] = padded[y + dy[i], x + dx[i]]
+                out[y, x] = function(buffer)
+        return out
+
+    @njit
+    def _numba_median(a):
+        return np.median(a)
+
+    @njit
+    def _numba_max(a):
+        return a.max()
+
+    @njit
+    def _numba_min(a):
+        return a.min()
+
+    # non-separable reductions we can run across threads with numba.
+    # ndimage's (single-threaded) filters are just as fast on one core
+    _NUMBA_REDUCERS = {
+        np.median: _numba_median,
+        np.max: _numba_max,
+        np.min: _numba_min
+    }
+
+def _use_numba(function=None):
+    """ should we run function= through our numba window kernel? """
+    if not _HAVE_NUMBA:
+        return False
+    # users can hand us their own @njit reductions (e.g., percentiles)
+    if is_jitted(function):
+        return True
+    return function in _NUMBA_REDUCERS and get_num_threads() > 1
+
+def _numba_window_reduce(image=None, footprint=None, function=None):
+    """ apply a (jitted) reduction to every footprint window of image with
+    our parallel numba kernel, reflecting at the edges like ndimage """
+    _rows, _cols = footprint.shape
+    _padded = np.pad(
+        image,
+        ((_rows // 2, _rows - 1 - _rows // 2),
+         (_cols // 2, _cols - 1 - _cols // 2)),
+        mode='symmetric'
+    )
+    _dy, _dx = (np.asarray(i, dtype=np.int64)
+                for i in np.nonzero(footprint))
+    return _numba_window_apply(_padded, _dy, _dx, image.shape[0],
+                               image.shape[1],
+                               _NUMBA_REDUCERS.get(function, function))
+
+# functions we can answer from prefix sums, rather than an ndimage filter
+_PREFIX_SUM_FUNCTIONS = (sum, np.sum, np.mean, np.std)
+
+def filter_sizes(r=None, function=None, sizes=None, dtype=np.uint16,
+                 out=None):
+    """ generator that applies a moving window for each of several window
+    sizes, yielding (size, numpy array) pairs. For sum, mean, and sd we
+    build our prefix sums once and re-use them across all of our sizes.
+    If out= is given, every result is written into (and yielded as) that
+    one buffer, so consume each result before asking for the next.
+    """
+    # args[2]/sizes=
+    if sizes is None:
+        raise IndexError("invalid sizes= argument specified")
+    if function not in _PREFIX_SUM_FUNCTIONS:
+        for size in sizes:
+            yield size, _to_buffer(
+                filter(r=r, write=False, function=function, size=size,
+                       dtype=dtype),
+                out)
+        return
+    # our prefix sums accumulate in 64 bits, so there's no need to cast
+    # our input up to our output dtype= first
+    try:
+        image = np.asarray(r.array)
+    except AttributeError:
+        image = np.asarray(r)
+    _pad = max(sizes)
+    _prefixes = _window_prefixes(image, function, _pad)
+    for size in sizes:
+        _result = _window_reduce(
+            image, _circular_footprint(size), function,
+            _prefixes, _pad)
+        yield size, _to_buffer(_result, out) if out is not None \
+            else np.array(_result, dtype=dtype)
+
+def _output_dtype(function=None, dtype=None, cells=None, value_range=None):
+    """ the smallest dtype that can hold the result of function= over
+    windows of (up to) cells= values of dtype= without overflowing -- a
+    binary reclass summed over a 33x33 circle fits in a uint16, and there
+    is no sense writing (or moving around) anything wider
+    :param value_range: (min, max) of our values, if we know it's narrower
+    than dtype='s full range (e.g., (0, 1) for a binary reclass)
+    """
+    dtype = np.dtype(dtype)
+    if function in (np.median, np.max, np.min):
+        return dtype
+    if function in (sum, np.sum) and dtype.kind in 'biu':
+        if value_range is None:
+            value_range = (0, 1) if dtype.kind == 'b' else \
+                (np.iinfo(dtype).min, np.iinfo(dtype).max)
+        _low = int(value_range[0]) * int(cells)
+        _high = int(value_range[1]) * int(cells)
+        # too wide for any integer type
+        if _low < np.iinfo(np.int64).min or _high > np.iinfo(np.uint64).max:
+            return np.dtype(np.float64)
+        if _low < 0:
+            # a signed type that holds -_high - 1 also holds _high
+            return np.result_type(np.min_scalar_type(_low),
+                                  np.min_scalar_type(-_high - 1))
+        return np.min_scalar_type(_high)
+    # means, standard deviations, float sums, and user functions
+    return np.dtype(np.float32)
+
+def _to_buffer(array=None, out=None):
+    """ cast array= into a pre-allocated out= buffer, if we have one """
+    if out is None:
+        return array
+    np.copyto(out, array, casting='unsafe')
+    return out
+
 def filter(r=None, dest_filename=None, write=True, footprint=None,
            overwrite=True, function=None, size=None, dtype=np.uint16):
     """ wrapper for ndimage.generic_filter that can comprehend a GeoRaster,
     apply a common circular buffer, and optionally writes a numpy array to
     disk following user specifications
     """
+    # only look for our destination if we're actually going to write it
+    _WRITE_FILE = False
+    if write:
+        try:
+            if dest_filename is None:
+                raise TypeError("dest_filename= is None")
+            _WRITE_FILE = overwrite or not os.path.isfile(dest_filename)
+        except TypeError as e:
+            logger.warning("encountered an issue specifying a write file -- "
+                           "filter will return result to user and not write "
+                           "to disc")
     try:
-        _WRITE_FILE = ((not os.path.isfile(dest_filename)) | overwrite) & write \
-        & (dest_filename is not None)
-    except TypeError as e:
-        logger.warning("encountered an issue specifying a write file -- ",
-                       "filter will return result to user and not write to disc")
-        _WRITE_FILE = False
-    try:
-        _FOOTPRINT = footprint if footprint is True else \
-        np.array(gen_circular_array(nPixels=size//2))
+        _FOOTPRINT = np.asarray(footprint) if footprint is not None \
+            else _circular_footprint(size)
     except TypeError as e:
         raise TypeError("Unknown size= or footprint= arguments passed to",
         "filter() :", e)
@@ -61,16 +433,23 @@ def filter(r=None, dest_filename=None, write=True, footprint=None,
         image = np.array(r, dtype=dtype)
     # these ndimage filters can be used for the most common functions
     # we may encounter for moving windows analyses
-    if function == np.median or function == np.mean:
+    if function in _PREFIX_SUM_FUNCTIONS:
+        _pad = max(_FOOTPRINT.shape)
+        image = np.array(
+            _window_reduce(image, _FOOTPRINT, function,
+                           _window_prefixes(image, function, _pad), _pad),
+            dtype=dtype
+        )
+    elif _use_numba(function):
+        image = np.array(
+            _numba_window_reduce(image, _FOOTPRINT, function),
+            dtype=dtype
+        )
+    elif function == np.median:
         image = ndimage.median_filter(
             input=image,
             footprint=_FOOTPRINT
         )
-    elif function == sum or function == np.sum:
-        image = ndimage.median_filter(
-            input = image,
-            footprint = _FOOTPRINT
-        ) * _FOOTPRINT.size
     elif function == np.max:
         image = ndimage.maximum_filter(
             input = image,
@@ -81,11 +460,17 @@ def filter(r=None, dest_filename=None, write=True, footprint=None,
             input = image,
             footprint = _FOOTPRINT
         )
-    # but, if all else fails, use the (slower) ndimage.generic_filter
+    # otherwise, reduce every window at once with a strided view if
+    # we can -- and if not, use the (much slower) generic_filter
+    elif _takes_axis(function):
+        image = np.array(
+            _strided_window_reduce(image, _FOOTPRINT, function),
+            dtype=dtype
+        )
     else:
-        logger.warning("couldn't find a suitable pre-canned ndimage function",
-                       "for your filter operation. Falling back on generic_filter,",
-                       "which may be slow")
+        logger.warning("%s doesn't accept an axis= argument -- falling "
+                       "back on generic_filter, which may be slow",
+                       function)
         try:
             image = ndimage.generic_filter(
                 input=np.array(image, dtype=dtype),
@@ -93,7 +478,7 @@ def filter(r=None, dest_filename=None, write=True, footprint=None,
                 footprint=_FOOTPRINT
             )
         except Exception as e:
-                raise RuntimeError("Failed to execute generic_filter using user-specified function. See:", e)
+            raise RuntimeError("Failed to execute generic_filter using user-specified function. See:", e)
     # either save to disk or return to user
     if _WRITE_FILE:
         try:
@@ -109,3 +494,231 @@ def filter(r=None, dest_filename=None, write=True, footprint=None,
             return image
     else:
         return image
+
+def _reclass_cache_filename(source_key=None, match=None):
+    """ disc cache filename (in _RECLASS_CACHE_DIR) for a binary reclass
+    of a source raster (as keyed by raster._disc_cache_filename) by a
+    list of match values """
+    _key = "%s:%s" % (source_key, ",".join(map(str, sorted(set(match)))))
+    return os.path.join(
+        _RECLASS_CACHE_DIR,
+        hashlib.sha1(_key.encode('utf-8')).hexdigest()[:16] + '_reclass.npy')
+
+def _prune_reclass_cache(max_files=_RECLASS_CACHE_MAX_FILES):
+    """ drop all but our max_files most recently written reclass caches """
+    try:
+        _files = [
+            os.path.join(_RECLASS_CACHE_DIR, f)
+            for f in os.listdir(_RECLASS_CACHE_DIR)
+            if f.endswith('_reclass.npy')
+        ]
+        _files.sort(key=os.path.getmtime, reverse=True)
+    except OSError:
+        return
+    for _file in _files[max_files:]:
+        try:
+            os.remove(_file)
+        except OSError:
+            pass
+
+def filter_file(src_filename=None, dest_filename=None, function=None,
+                sizes=None, match=None, strip_bytes=_DEFAULT_STRIP_BYTES,
+                tile_bytes=_DEFAULT_TILE_BYTES, dtype=None,
+                disc_caching=None):
+    """ apply our moving windows to a raster file on disc a strip of rows
+    at a time -- with a halo of max(sizes)//2 rows above and below each
+    strip -- rather than reading the whole raster into memory. The next
+    strip is read on a background thread while we filter the current one.
+    Writes one GeoTIFF per window size (dest_filename_WxW.tif).
+    :param src_filename: full path to our source raster
+    :param dest_filename: prefix for our output filenames
+    :param function: function to apply over each window
+    :param sizes: list of window sizes
+    :param match: optional list of values to binary reclassify by first --
+    or a dict of {class name: list of values} to reclassify (and filter)
+    each of several classes from a single read of our source, writing
+    dest_filename_name_WxW.tif for each class
+    :param strip_bytes: (approximate) size of each strip we read
+    :param tile_bytes: (approximate) size of the prefix sums for each
+    tile of a strip that we filter at once -- keep these cache-sized
+    :param dtype: numpy dtype of our output rasters (default: the
+    smallest type that holds our results -- see _output_dtype)
+    :param disc_caching: keep our binary reclassification in a .npy disc
+    cache (keyed on our source file and match=, under _RECLASS_CACHE_DIR),
+    so that later runs with the same reclass read it rather than decoding
+    and reclassifying our source again. We keep (up to)
+    _RECLASS_CACHE_MAX_FILES of the most recently written caches
+    :return: list of output filenames
+    """
+    # lazy-load GDAL, so our in-memory filters don't need it
+    from osgeo import gdal, gdal_array
+    from beatbox.raster import _create_geotiff, _gdal_open, \
+        _local_binary_reclassify, _disc_cache_filename
+    # args[0]/src_filename=
+    if src_filename is None:
+        raise IndexError("invalid src_filename= argument specified")
+    # args[1]/dest_filename=
+    if dest_filename is None:
+        raise IndexError("invalid dest_filename= argument specified")
+    # args[3]/sizes=
+    if sizes is None:
+        raise IndexError("invalid sizes= argument specified")
+    # args[4]/match= -- {output prefix: match values (or None)}
+    if isinstance(match, dict):
+        _classes = {
+            dest_filename + "_" + str(name): values
+            for name, values in match.items()
+        }
+    else:
+        _classes = {dest_filename: match}
+    _src = _gdal_open(src_filename)
+    if _src is None:
+        raise OSError("gdal failed to open src_filename= " +
+                      str(src_filename))
+    _band = _src.GetRasterBand(1)
+    _cols, _rows = _src.RasterXSize, _src.RasterYSize
+    _halo = max(sizes) // 2
+    _strip_rows = max(
+        2 * _halo + 1,
+        strip_bytes // (_cols * gdal.GetDataTypeSize(_band.DataType) // 8)
+    )
+    # start every strip on a block boundary of our source, so GDAL never
+    # decompresses a block for one strip and then again for the next
+    _block_rows = _band.GetBlockSize()[1]
+    _strip_rows = max(_block_rows, _strip_rows // _block_rows * _block_rows)
+    if dtype is None:
+        dtype = _output_dtype(
+            function,
+            np.uint8 if match is not None else
+            gdal_array.GDALTypeCodeToNumericTypeCode(_band.DataType),
+            np.count_nonzero(_circular_footprint(max(sizes))),
+            value_range=(0, 1) if match is not None else None
+        )
+    _tile_rows = max(1, tile_bytes // (_cols * np.dtype(np.int64).itemsize))
+    # one output strip per window size, re-used for every strip (and class)
+    _buffers = {
+        size: np.empty((min(_rows, _strip_rows), _cols), dtype=dtype)
+        for size in sizes
+    }
+    _outputs = {}
+    for prefix in _classes:
+        for size in sizes:
+            _dataset, _filename = _create_geotiff(
+                _dict_to_mwindow_filename(prefix, size), (_rows, _cols),
+                format=gdal_array.NumericTypeCodeToGDALTypeCode(dtype),
+                geot=_src.GetGeoTransform(),
+                projection=_src.GetProjectionRef()
+            )
+            if _band.GetNoDataValue() is not None:
+                _dataset.GetRasterBand(1).SetNoDataValue(
+                    _band.GetNoDataValue())
+            _outputs[(prefix, size)] = (_dataset, _filename)
+
+    # an existing reclass cache stands in for our source (and reclass) --
+    # otherwise we fill a new one as we go
+    _caches, _new_caches = {}, {}
+    if disc_caching and match is not None:
+        os.makedirs(_RECLASS_CACHE_DIR, exist_ok=True)
+        for prefix, values in _classes.items():
+            _cache_filename = _reclass_cache_filename(
+                _disc_cache_filename(src_filename, np.uint8), values)
+            if os.path.exists(_cache_filename):
+                _caches[prefix] = np.load(_cache_filename, mmap_mode='r')
+            else:
+                # other processes may be filling the same cache -- each
+                # fills its own temporary file
+                _tmp = "%s.%d.tmp" % (_cache_filename, os.getpid())
+                _new_caches[prefix] = [np.lib.format.open_memmap(
+                    _tmp, mode='w+', dtype=np.uint8, shape=(_rows, _cols)),
+                    _tmp, _cache_filename]
+    # every class we still have to reclassify gets its own layer of one
+    # (classes, rows, cols) scratch stack, re-used for every strip
+    _reclass = [
+        prefix for prefix, values in _classes.items()
+        if values is not None and prefix not in _caches
+    ]
+    _scratch = np.empty((len(_reclass), min(_rows, _strip_rows + 2 * _halo),
+                         _cols), dtype=np.uint8)
+
+    def _read(row):
+        """ read the strip starting at row=, plus its halo, from our
+        source (if we need it) and any existing reclass caches """
+        _top = max(0, row - _halo)
+        _bottom = min(_rows, row + _strip_rows + _halo)
+        _strips = {
+            prefix: np.asarray(_cache[_top:_bottom])
+            for prefix, _cache in _caches.items()
+        }
+        if len(_strips) < len(_classes):
+            _strips[None] = _band.ReadAsArray(0, _top, _cols, _bottom - _top)
+        return _top, _strips
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as _reader:
+            _pending = _reader.submit(_read, 0)
+            for row in range(0, _rows, _strip_rows):
+                _top, _strips = _pending.result()
+                logger.debug("filtering rows %d-%d of %d from %s", row,
+                             min(row + _strip_rows, _rows), _rows, src_filename)
+                if row + _strip_rows < _rows:
+                    _pending = _reader.submit(_read, row + _strip_rows)
+                _source = _strips.pop(None, None)
+                for i, prefix in enumerate(_reclass):
+                    # reclassify every class from the one strip we read
+                    _strips[prefix] = _local_binary_reclassify(
+                        _source, _classes[prefix],
+                        out=_scratch[i, :len(_source)])
+                for prefix, values in _classes.items():
+                    if values is None:
+                        _strips[prefix] = _source
+                _n_rows = min(_strip_rows, _rows - row)
+                for prefix, (_cache, _, _) in _new_caches.items():
+                    _cache[row:row + _n_rows] = \
+                        _strips[prefix][row - _top:row - _top + _n_rows]
+                for prefix in _classes:
+                    _strip = _strips[prefix]
+                    _results = {
+                        size: _buffers[size][:_n_rows] for size in sizes
+                    }
+                    # walk cache-sized tiles of our strip (with their own
+                    # halos) and run every window size over a tile while it's
+                    # still hot, rather than streaming the whole strip once
+                    # per size
+                    for _tile_row in range(row, row + _n_rows, _tile_rows):
+                        _tile_top = max(_top, _tile_row - _halo)
+                        _tile_n_rows = min(_tile_rows, row + _n_rows - _tile_row)
+                        _tile = _strip[
+                            _tile_top - _top:
+                            min(_tile_row + _tile_n_rows + _halo, _rows) - _top
+                        ]
+                        for size, _result in filter_sizes(
+                                _tile, function=function, sizes=sizes,
+                                dtype=dtype):
+                            # trim our halo back off
+                            _results[size][_tile_row - row:
+                                           _tile_row - row + _tile_n_rows] = \
+                                _result[_tile_row - _tile_top:
+                                        _tile_row - _tile_top + _tile_n_rows]
+                    for size in sizes:
+                        _outputs[(prefix, size)][0].GetRasterBand(1).WriteArray(
+                            _results[size], xoff=0, yoff=row)
+        for _dataset, _ in _outputs.values():
+            _dataset.FlushCache()
+        for _new_cache in _new_caches.values():
+            # only publish our caches once they're complete
+            _new_cache[0].flush()
+            _new_cache[0] = None
+            os.replace(_new_cache[1], _new_cache[2])
+    finally:
+        # don't leave partial caches behind if we failed part-way
+        for _new_cache in _new_caches.values():
+            _new_cache[0] = None
+            try:
+                os.remove(_new_cache[1])
+            except OSError:
+                pass
+    if _new_caches:
+        _prune_reclass_cache()
+    _filenames = [_filename for _, _filename in _outputs.values()]
+    del _band, _src, _outputs, _caches, _new_caches
+    return _filenames
@@ -11,16 +11,24 @@ __email__ = "kyle.taylor@pljv.org"
 __status__ = "Testing"
 
 # mmap file caching and file handling
-import sys
+import os
+import mmap
+import contextlib
+import hashlib
+import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from random import randint
-from copy import copy
 # raster manipulation
 from georasters import GeoRaster
-from georasters import get_geo_info, create_geotiff, merge
-import gdalnumeric
+from georasters import merge
 import gdal
 import numpy as np
 from osgeo import gdal_array
+from osgeo import osr
+from scipy import ndimage
+from affine import Affine
+from shapely.geometry import box
 # memory profiling
 import types
 import psutil
@@ -28,26 +36,37 @@ import psutil
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
-# Fickle beast handlers for Earth Engine
+# Earth Engine is imported (and initialized) on first use
+from beatbox.do import _import_ee
+# Numba is optional -- we use it for a few hot kernels when it's around
 try:
-    import ee
-    ee.Initialize()
-    _HAVE_EE = True
-except Exception:
-    _HAVE_EE = False
-    logger.warning("Failed to load the Earth Engine API. "
-                   "Check your installation. Will continue "
-                   "to load but without the EE functionality.")
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+# ... and numexpr is an optional, fused alternative for our ufunc chains
+try:
+    import numexpr as ne
+    _HAVE_NUMEXPR = True
+except ImportError:
+    _HAVE_NUMEXPR = False
+
+# give GDAL's block cache some more room (in MB), unless the user (or
+# our caller) has already sized it
+if gdal.GetConfigOption('GDAL_CACHEMAX') is None:
+    gdal.SetConfigOption('GDAL_CACHEMAX', '512')
 
 # short-hand string identifiers for numpy
 # types. Int, float, and byte will be the
 # most relevant for raster arrays, but the
-# gang is all here
-NUMPY_TYPES = {
+# gang is all here. We store np.dtype instances
+# (not scalar type classes) so downstream calls
+# don't re-derive a dtype from the class each time
+NUMPY_TYPES = {k: np.dtype(v) for k, v in {
   "uint8": np.uint8,
-  "int8": np.uint8,
+  "int8": np.int8,
   "int": np.intc,
-  "byte": np.int8,
+  "byte": np.uint8,  # GDAL's Byte is unsigned
   "uint16": np.uint16,
   "int16": np.int16,
   "uint32": np.uint32,
@@ -57,10 +76,66 @@ NUMPY_TYPES = {
   "float64": np.float64,
   "complex64": np.complex64,
   "complex128": np.complex128
-}
+}.items()}
+
+# every string we'll accept for a NUMPY_TYPES entry (e.g., 'UInt16',
+# 'numpy.uint16', "<class 'numpy.uint16'>"), built once at import
+_NUMPY_TYPE_ALIASES = {}
+for _key, _dtype in NUMPY_TYPES.items():
+    for _alias in (_key, "np." + _dtype.name, "numpy." + _dtype.name,
+                   str(_dtype.type), _dtype.name):
+        _NUMPY_TYPE_ALIASES.setdefault(_alias.lower(), _dtype)
 
 _DEFAULT_NA_VALUE = 0
 _DEFAULT_PRECISION = np.uint16
+_DEFAULT_BLOCK_SHAPE = (256, 256)  # (rows, cols) for blockwise processing
+_DEFAULT_TILE_BYTES = 256 * 1024  # tiles sized to fit in L2 cache
+_TERRAIN_NA_VALUE = -9999  # no data value used for slope/aspect output
+_CENTRAL_DIFFERENCE = np.array([-0.5, 0.0, 0.5], dtype=np.float32)
+_TERRAIN_PRECISION = np.float32  # slope/aspect are memory-bound -- keep them small
+
+# access pattern hints for madvise() on our disc caches -- not
+# every platform defines every flag, so missing flags are None
+_MADV_PATTERNS = {
+  "normal": getattr(mmap, "MADV_NORMAL", None),
+  "sequential": getattr(mmap, "MADV_SEQUENTIAL", None),
+  "random": getattr(mmap, "MADV_RANDOM", None),
+  "willneed": getattr(mmap, "MADV_WILLNEED", None),
+  "dontneed": getattr(mmap, "MADV_DONTNEED", None)
+}
+# ... and the posix_fadvise hints that act on the page cache behind a
+# cache file itself. Readahead hints (sequential, random) only apply to
+# the file description they're issued on, so there's no sense issuing
+# those on a descriptor we close right away
+_FADV_PATTERNS = {
+  "willneed": getattr(os, "POSIX_FADV_WILLNEED", None),
+  "dontneed": getattr(os, "POSIX_FADV_DONTNEED", None)
+}
+
+# reference counts for disc cache files shared by open Raster
+# objects, keyed by cache filename
+_DISC_CACHE_REFS = {}
+_TILE_CACHE_SUFFIX = '.tiles'
+
+# specialized Raster classes built by Raster.specialize(), keyed
+# by their (shape, dtype, ndv) tuple so we only build each once
+_SPECIALIZED_RASTERS = {}
+# remote (e.g., COG) rasters are read through GDAL's /vsicurl/ and /vsis3/
+# handlers with HTTP range requests, so we only fetch the blocks we read.
+# These options are only set while we open a remote raster (see
+# _gdal_open): don't list the remote "directory" looking for sidecar
+# files, and cache the blocks we fetch
+_REMOTE_CONFIG_OPTIONS = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'VSI_CACHE': 'TRUE',
+    'VSI_CACHE_SIZE': str(256 * 1024 * 1024)
+}
+# URL schemes we hand to GDAL's virtual file system, and their prefixes
+_REMOTE_SCHEMES = {
+    'http://': '/vsicurl/',
+    'https://': '/vsicurl/',
+    's3://': '/vsis3/'
+}
 
 class Raster(object):
 
@@ -75,18 +150,22 @@ class Raster(object):
     """
 
     def __init__(self, filename=None, array=None, dtype=None,
-                 disc_caching=None):
+                 disc_caching=None, block_windows=None):
         # Privates
         self._backend = "local"
-        self._array = None
+        self._data = None   # raw numpy array (or memmap)
+        self._array = None  # masked view of _data, built on first use
         self._filename = None
         self._using_disc_caching = None  # Use mmcache?
+        self._projection = None
+        self._projection_wkt = None  # WKT export of _projection, on use
         # Public properties (maintained for GeoRasters)
         self.ndv = _DEFAULT_NA_VALUE # no data value
         self.x_cell_size = None  # cell size of x (meters/degrees)
         self.y_cell_size = None  # cell size of y (meters/degrees)
         self.geot = None         # geographic transformation
         self.projection = None   # geographic projection
+        self.band_descriptions = None  # per-band description strings
         self.dtype = _DEFAULT_PRECISION
         # args[0]/file=
         self.filename = filename
@@ -98,46 +177,153 @@ class Raster(object):
         # args[3]/disc_cache=
         if disc_caching is not None:
             self._using_disc_caching = str(randint(1, 9999999999)) + \
-                                       '_np_binary_array.dat'
+                                       '_np_binary_array.npy'
         # if we were passed a file argument, assume it's a
         # path and try to open it
         if self.filename is not None:
             try:
-                self.open(self.filename)
+                # args[4]/block_windows=
+                self.open(self.filename, block_windows=block_windows)
             except OSError:
                 raise OSError("couldn't open the filename provided")
 
     def __copy__(self):
+        """
+        Shallow copy -- the new Raster binds a reference to our array
+        (and disc cache) rather than duplicating it
+        """
         _raster = Raster()
-        _raster._array = copy(self._array)
-        _raster._backend = copy(self._backend)
-        _raster._filename = copy(self._filename)
-        _raster._using_disc_caching = copy(self._filename)
+        _raster._data = self._data
+        _raster._array = self._array
+        _raster._backend = self._backend
+        _raster._filename = self._filename
+        _raster._using_disc_caching = self._using_disc_caching
+        if self._using_disc_caching in _DISC_CACHE_REFS:
+            _DISC_CACHE_REFS[self._using_disc_caching] += 1
         _raster.ndv = self.ndv
         _raster.x_cell_size = self.x_cell_size
         _raster.y_cell_size = self.y_cell_size
         _raster.geot = self.geot
         _raster.projection = self.projection
-        # if we are mem caching, generate a new tempfile
+        _raster.dtype = self.dtype
         return _raster
 
     def __deepcopy__(self, memodict={}):
-        return self.__copy__()
+        """
+        Full copy -- the new Raster gets its own in-memory array
+        """
+        _raster = self.__copy__()
+        _raster._release_disc_cache()
+        _raster._using_disc_caching = None
+        if self._array is not None:
+            _raster.array = self._array.copy()
+        elif self._data is not None:
+            _raster.array = np.array(self._data)
+        return _raster
+
+    def __del__(self):
+        self._release_disc_cache()
+
+    def _release_disc_cache(self):
+        """
+        Drop our reference to a shared disc cache file and remove the
+        file once no other Raster is using it.
+        """
+        _cache = getattr(self, '_using_disc_caching', None)
+        if _cache not in _DISC_CACHE_REFS:
+            return
+        self._data = None
+        self._array = None
+        _DISC_CACHE_REFS[_cache] -= 1
+        if _DISC_CACHE_REFS[_cache] < 1:
+            del _DISC_CACHE_REFS[_cache]
+            try:
+                os.remove(_cache)
+            except OSError:
+                pass
+
+    @classmethod
+    def specialize(cls, shape=None, dtype=None, ndv=None):
+        """
+        Build (once) a Raster subclass for a fixed array shape, dtype,
+        and no data value. The constants are baked into the class so
+        that opening thousands of same-sized tiles skips the dtype
+        lookups and mask re-casting done by the generic Raster.
+        :param shape: tuple specifying (rows, cols) of our tiles
+        :param dtype: numpy type (or NUMPY_TYPES string) of our tiles
+        :param ndv: no data value (defaults to _DEFAULT_NA_VALUE)
+        :return: a Raster subclass
+        """
+        # args[0]/shape=
+        if shape is None:
+            raise IndexError("invalid shape= argument specified")
+        # args[1]/dtype=
+        if dtype is None:
+            raise IndexError("invalid dtype= argument specified")
+        # args[2]/ndv=
+        if ndv is None:
+            ndv = _DEFAULT_NA_VALUE
+        _shape = tuple(int(i) for i in shape)
+        _dtype = _to_numpy_type(dtype)
+        _ndv = _dtype.type(ndv)
+        # NaN != NaN, so normalize it or a NaN ndv never hits the cache
+        _key = (_shape, _dtype.str,
+                'nan' if _ndv != _ndv else _ndv.item())
+        if _key not in _SPECIALIZED_RASTERS:
+            _SPECIALIZED_RASTERS[_key] = _build_specialized_raster(
+                cls, _shape, _dtype, _ndv
+            )
+        return _SPECIALIZED_RASTERS[_key]
+
+    def __getitem__(self, key):
+        """
+        Return a masked window of our array. Only the requested window
+        is compared against our no data value, so tiled consumers never
+        pay for a whole-raster mask.
+        """
+        _window = self._data[key]
+        return np.ma.masked_array(
+            _window,
+            mask=_build_mask(_window, self.ndv),
+            fill_value=self.ndv,
+            copy=False
+        )
 
     @property
     def array(self):
+        """
+        Our data as a numpy masked array. The no data mask is a full
+        pass over the raster, so it isn't built until somebody asks.
+        """
+        if self._array is None and self._data is not None:
+            self._array = np.ma.masked_array(
+                self._data,
+                mask=_build_mask(self._data, self.ndv),
+                fill_value=self.ndv,
+                copy=False
+            )
         return self._array
 
     @array.setter
     def array(self, *args):
         """
-        Assign a numpy masked array to our Raster object
+        Assign a numpy (or masked) array to our Raster object
         """
-        self._array = np.ma.masked_array(
-            args[0],
-            mask=self._array == self.ndv,
-            fill_value=self.ndv
-        )
+        if isinstance(args[0], np.ma.MaskedArray):
+            # somebody already built a mask for us -- keep it
+            self._data = args[0].data
+            self._array = args[0]
+        else:
+            self._data = args[0]
+            self._array = None
+
+    @property
+    def data(self):
+        """
+        Our raw (unmasked) numpy array. Use this for operations that
+        don't care about no data values to skip building a mask.
+        """
+        return self._data
 
     @property
     def filename(self):
@@ -155,79 +341,325 @@ class Raster(object):
     def backend(self, *args):
         self._backend = args[0]
 
-    def open(self, file=None, dtype=None):
+    @property
+    def extent(self):
+        """
+        Our (xmin, ymin, xmax, ymax) bounding box, derived from our
+        geographic transformation. Cached on (geot, shape), so tile loops
+        don't re-derive it on every access.
+        """
+        if self.geot is None or self._data is None:
+            return None
+        return _geot_extent(tuple(self.geot), self._data.shape)
+
+    @property
+    def bounding_box(self):
+        """ Our extent as a shapely Polygon (cached on our extent) """
+        _extent = self.extent
+        if _extent is None:
+            return None
+        return _extent_box(_extent)
+
+    @property
+    def affine(self):
+        """ Our geographic transformation as an (immutable) Affine """
+        if self.geot is None:
+            return None
+        return _geot_affine(tuple(self.geot))
+
+    @property
+    def projection(self):
+        return self._projection
+
+    @projection.setter
+    def projection(self, *args):
+        self._projection = args[0]
+        self._projection_wkt = None
+
+    @property
+    def projection_wkt(self):
+        """
+        Our projection as a WKT string. Exported once per assignment of
+        .projection, rather than on every access.
+        """
+        if self._projection is None:
+            return None
+        if self._projection_wkt is None:
+            self._projection_wkt = self._projection.ExportToWkt() \
+                if hasattr(self._projection, 'ExportToWkt') \
+                else self._projection
+        return self._projection_wkt
+
+    @property
+    def projection_proj4(self):
+        """ Our projection as a PROJ.4 string (cached on its WKT) """
+        if self.projection is None:
+            return None
+        return _wkt_to_proj4(self.projection_wkt)
+
+    def advise(self, pattern=None):
+        """
+        Hint the kernel about how we intend to access a disc-cached
+        array (e.g., 'sequential' for full passes, 'random' for window
+        access). Does nothing for in-memory arrays.
+        :param pattern: one of the keys in _MADV_PATTERNS
+        :return: None
+        """
+        # args[0]/pattern=
+        if pattern is None:
+            raise IndexError("invalid pattern= argument provided")
+        _madvise(self._data, pattern)
+
+    def open(self, file=None, dtype=None, block_windows=None):
         """
         Open a local file handle for reading and assignment
         :param file:
+        :param dtype:
+        :param block_windows: read the file one GDAL (natural) block at a
+        time, rather than with a single whole-raster read
         :return: None
         """
         # args[0]/file=
         if file is None:
             raise IndexError("invalid file= argument provided")
-        # grab raster meta information from GeoRasters
+        # open our dataset once and pull our meta information (and
+        # later, our band) from the same handle
+        _raster_file = _gdal_open(file)
+        if _raster_file is None:
+            raise OSError("gdal failed to open file= argument")
         try:
             self.ndv, self.x_cell_size, self.y_cell_size, self.geot, self.projection, self.dtype = \
-                get_geo_info(file)
+                _get_geo_info(_raster_file)
         except Exception:
             raise AttributeError("problem processing file input -- is this",
                                  "a raster file?")
+        self.band_descriptions = _band_descriptions(_raster_file)
         # args[1]/dtype=
         if dtype is not None:
             # override our shadow'd value from GeoRasters if
             # something was specified by the user
             self.dtype = dtype
         # re-cast our datatype as a numpy type, if needed
-        if type(self.dtype) == str:
-            self.dtype = NUMPY_TYPES[self.dtype.lower()]
+        self.dtype = _to_numpy_type(self.dtype)
         if self.ndv is None:
             self.ndv = _DEFAULT_NA_VALUE
         # low-level call to gdal with explicit type specification
         # that will store in memory or as a disc cache, depending
         # on the state of our _using_disc_caching property
+        _shape = (_raster_file.RasterYSize, _raster_file.RasterXSize)
         if self._using_disc_caching is not None:
-            # create a cache file
-            self.array = np.memmap(
-                self._using_disc_caching, dtype=dtype, mode='w+', shape=(_x_size, _y_size)
-            )
-            # load file contents into the cache
-            self.array[:] = gdalnumeric.LoadFile(
-                filename=self.filename,
-                buf_type=gdal_array.NumericTypeCodeToGDALTypeCode(self.dtype)
-            )[:]
+            # our cache file is keyed on the source file's contents, so
+            # re-opening the same dataset can re-use an existing cache
+            self._release_disc_cache()
+            self._using_disc_caching = _disc_cache_filename(file, self.dtype)
+            # our caches are .npy files, so the header tells us whether
+            # an existing cache matches what we're about to read. Caches
+            # are only ever published complete (see below), and are
+            # mapped copy-on-write so that writes to one Raster's array
+            # don't leak into the cache (or other Rasters sharing it)
+            _buffer = None
+            if os.path.exists(self._using_disc_caching):
+                try:
+                    _buffer = np.load(self._using_disc_caching,
+                                      mmap_mode='c')
+                except ValueError:
+                    _buffer = None
+                if _buffer is not None and (
+                        _buffer.shape != _shape or
+                        _buffer.dtype != np.dtype(self.dtype)):
+                    _buffer = None
+            if _buffer is None:
+                # fill a temporary cache file sized to our source raster
+                # and only move it into place once it's complete, so a
+                # crash (or another process) never sees a half-filled one
+                _tmp = "%s.%d.tmp" % (self._using_disc_caching, os.getpid())
+                _buffer = np.lib.format.open_memmap(
+                    _tmp, dtype=self.dtype, mode='w+', shape=_shape
+                )
+                # load file contents into the cache -- this is a single
+                # front-to-back pass, so let the kernel read ahead
+                _madvise(_buffer, "sequential")
+                _read_band_into(_raster_file, _buffer,
+                                block_windows=block_windows)
+                _buffer.flush()
+                del _buffer
+                os.replace(_tmp, self._using_disc_caching)
+                _buffer = np.load(self._using_disc_caching, mmap_mode='c')
+            # downstream window/tile access is typically random
+            _madvise(_buffer, "random")
+            _DISC_CACHE_REFS[self._using_disc_caching] = \
+                _DISC_CACHE_REFS.get(self._using_disc_caching, 0) + 1
+            self.array = _buffer
         # by default, load the whole file into memory
         else:
-            self.array = gdalnumeric.LoadFile(
-                filename=self.filename,
-                buf_type=gdal_array.NumericTypeCodeToGDALTypeCode(self.dtype)
+            self.array = _read_band_into(
+                _raster_file,
+                np.empty(_shape, dtype=self.dtype),
+                block_windows=block_windows
             )
-        # make sure we honor our no data value
-        self.array = np.ma.masked_array(
-            self.array,
-            mask=self.array == self.ndv,
-            fill_value=self.ndv
-        )
+        del _raster_file
 
-    def write(self, dst_filename=None, format=gdal.GDT_UInt16, driver=gdal.GetDriverByName('GTiff')):
+    def to_tiles(self, tile_shape=None):
         """
-        Wrapper for GeoRaster's create_geotiff that writes a numpy array to disk.
-        :param dst_filename:
-        :param format:
-        :param driver:
-        :return:
+        Copy our raster into a tile-major array shaped (tile rows, tile
+        cols, rows per tile, cols per tile) so that every tile is contiguous
+        in memory -- or on disc, if we are disc caching. Blockwise work can
+        then walk tiles without striding across whole rows of a row-major
+        array. Partial tiles along the edges are padded with our ndv.
+        :param tile_shape: (rows, cols) of each tile
+        :return: 4-d numpy array (or memmap)
+        """
+        # args[0]/tile_shape=
+        if tile_shape is None:
+            tile_shape = _DEFAULT_BLOCK_SHAPE
+        if self._data is None:
+            raise AttributeError("no array data to tile -- open a file first")
+        _rows, _cols = self._data.shape
+        _tile_rows, _tile_cols = tile_shape
+        _shape = (-(-_rows // _tile_rows), -(-_cols // _tile_cols),
+                  _tile_rows, _tile_cols)
+        if self._using_disc_caching in _DISC_CACHE_REFS:
+            # every call gets its own file next to our (shared) cache, so
+            # we never truncate tiles another Raster (or call) still maps.
+            # We unlink it straight away -- the OS keeps it around for as
+            # long as our memmap holds it open
+            _fd, _filename = tempfile.mkstemp(
+                prefix=os.path.basename(self._using_disc_caching) + '.',
+                suffix=_TILE_CACHE_SUFFIX,
+                dir=os.path.dirname(os.path.abspath(
+                    self._using_disc_caching))
+            )
+            os.close(_fd)
+            _tiles = np.memmap(_filename, dtype=self._data.dtype,
+                               mode='w+', shape=_shape)
+            try:
+                os.remove(_filename)
+            except OSError:
+                # (some platforms can't unlink a file that's mapped)
+                pass
+        else:
+            _tiles = np.empty(_shape, dtype=self._data.dtype)
+        for _row, _col, _n_rows, _n_cols in _block_windows(
+                self._data.shape, tile_shape):
+            _tile = _tiles[_row // _tile_rows, _col // _tile_cols]
+            _tile[:_n_rows, :_n_cols] = \
+                self._data[_row:_row + _n_rows, _col:_col + _n_cols]
+            _tile[_n_rows:, :] = self.ndv
+            _tile[:, _n_cols:] = self.ndv
+        return _tiles
+
+    def map_blocks(self, function=None):
+        """
+        Apply a function to each natural (GDAL) block of our raster as a
+        masked array. If we haven't loaded an array yet, blocks are read
+        straight from our file so only one block is ever resident.
+        :param function: function that accepts a masked numpy array
+        :return: generator of ((row_off, col_off, rows, cols), result)
+        """
+        # args[0]/function=
+        if function is None:
+            raise IndexError("invalid function= argument provided")
+        if self._data is None and self._filename is not None:
+            _raster_file = _gdal_open(self._filename)
+            if _raster_file is None:
+                raise OSError("gdal failed to open our filename")
+            _band = _raster_file.GetRasterBand(1)
+            _buf_type = gdal_array.NumericTypeCodeToGDALTypeCode(
+                np.dtype(self.dtype).type
+            )
+            _x_block, _y_block = _band.GetBlockSize()
+            for _window in _block_windows(
+                    (_raster_file.RasterYSize, _raster_file.RasterXSize),
+                    (_y_block, _x_block)):
+                _row, _col, _rows, _cols = _window
+                _block = _band.ReadAsArray(_col, _row, _cols, _rows,
+                                           buf_type=_buf_type)
+                yield _window, function(np.ma.masked_array(
+                    _block,
+                    mask=_build_mask(_block, self.ndv),
+                    fill_value=self.ndv,
+                    copy=False
+                ))
+            del _raster_file
+        else:
+            for _window in _block_windows(self._data.shape):
+                _row, _col, _rows, _cols = _window
+                yield _window, function(
+                    self[_row:_row + _rows, _col:_col + _cols]
+                )
+
+    def write(self, dst_filename=None, format=None,
+              driver=gdal.GetDriverByName('GTiff'), block_shape=None):
+        """
+        Write our array to disk as a (tiled, deflate-compressed) GeoTIFF.
+        We write one block at a time, so a disc cached raster is never
+        loaded into memory in full.
+        :param dst_filename: output filename ('.tif' is appended if the
+        name doesn't already have a GeoTIFF extension)
+        :param format: GDAL data type to write (defaults to the GDAL
+        equivalent of our array's dtype)
+        :param driver: GDAL driver to write with
+        :param block_shape: (rows, cols) of our output tiles
+        :return: string filename
         """
         if not dst_filename:
             dst_filename = self.filename
-        return create_geotiff(
-            name=dst_filename,
-            Array=self.array,
-            geot=self.geot,
-            projection=self.projection,
-            datatype=format,
-            driver=driver,
-            ndv=self.ndv,
-            xsize=self.x_cell_size,
-            ysize=self.y_cell_size
+        # args[1]/format=
+        if format is None:
+            format = gdal_array.NumericTypeCodeToGDALTypeCode(
+                self._data.dtype.type
+            )
+            if format is None:
+                raise ValueError("no GDAL data type for our array's dtype "
+                                 "(%s) -- specify format=" % self._data.dtype)
+        # args[3]/block_shape=
+        if block_shape is None:
+            block_shape = _DEFAULT_BLOCK_SHAPE
+        _rows, _cols = self._data.shape
+        _dataset, dst_filename = _create_geotiff(
+            dst_filename, (_rows, _cols), format=format, driver=driver,
+            block_shape=block_shape, geot=self.geot,
+            projection=self.projection
         )
+        _band = _dataset.GetRasterBand(1)
+        _band.SetNoDataValue(self.ndv)
+        # if somebody handed us a mask, honor it -- otherwise our raw
+        # array already holds our ndv wherever there is no data
+        _source = self._array if self._array is not None else self._data
+        for _row, _col, _n_rows, _n_cols in _block_windows(
+                (_rows, _cols), block_shape):
+            _block = np.ma.filled(
+                _source[_row:_row + _n_rows, _col:_col + _n_cols], self.ndv
+            )
+            if _block.dtype.kind == 'f':
+                # like GeoRasters, NaNs are written as our ndv
+                _block = np.where(np.isnan(_block), self.ndv, _block)
+            _band.WriteArray(_block, xoff=_col, yoff=_row)
+        _band.FlushCache()
+        del _band, _dataset
+        return dst_filename
+
+    def shared_handle(self):
+        """
+        Describe our disc cache by filename, shape, dtype, and no data value
+        so that it can be passed to other processes cheaply. Workers can
+        re-open the cache read-only with _from_shared_handle(). Note that
+        they see our source raster's values -- our array is mapped
+        copy-on-write, so any edits we've made to it are our own.
+        :return: dict
+        """
+        # disc_caching=True only names a cache file; it doesn't exist
+        # (and isn't tracked) until we've opened a file into it
+        if self._using_disc_caching not in _DISC_CACHE_REFS or \
+                self._data is None:
+            raise AttributeError("shared handles require a disc cached "
+                                 "raster -- use disc_caching=True")
+        return {
+            'path': self._using_disc_caching,
+            'shape': self._data.shape,
+            'dtype': np.dtype(self._data.dtype).str,
+            'ndv': self.ndv
+        }
 
     def to_numpy_array(self):
         """
@@ -257,9 +689,92 @@ class Raster(object):
         dynamically ingesting raster data on Earth Engine, but it's currently
         broken
         """
-        logger.warning("to_ee_image() is an experimental feature -- we are",
+        logger.warning("to_ee_image() is an experimental feature -- we are "
                        "still working through asset ingestion for earth engine.")
-        return ee.array(self.array)
+        return _import_ee().array(self.array)
+
+
+def _build_specialized_raster(base=None, shape=None, dtype=None, ndv=None):
+    """
+    Hidden factory used by Raster.specialize(). Returns a subclass of base
+    whose __init__, open, and to_georaster use the shape, dtype, and ndv
+    captured here, rather than re-deriving them for every tile we open.
+    :param base: Raster class we are specializing
+    :param shape: tuple of (rows, cols)
+    :param dtype: np.dtype instance
+    :param ndv: no data value cast as a dtype scalar
+    :return: a Raster subclass
+    """
+    _gdal_type = gdal_array.NumericTypeCodeToGDALTypeCode(dtype.type)
+
+    def __init__(self, filename=None, array=None, disc_caching=None):
+        # let the base class set up every field, then bake in our
+        # constants before anything is read
+        base.__init__(self, dtype=dtype.type, disc_caching=disc_caching)
+        self.ndv = ndv
+        if array is not None:
+            self.array = array
+        self.filename = filename
+        if self._filename is not None:
+            try:
+                self.open(self._filename)
+            except OSError:
+                raise OSError("couldn't open the filename provided")
+
+    def _open(self, file=None):
+        # args[0]/file=
+        if file is None:
+            raise IndexError("invalid file= argument provided")
+        _raster_file = _gdal_open(file)
+        if _raster_file is None:
+            raise OSError("gdal failed to open file= argument")
+        # we only need georeferencing -- our ndv and dtype are
+        # already known
+        try:
+            _, self.x_cell_size, self.y_cell_size, self.geot, \
+                self.projection, _ = _get_geo_info(_raster_file)
+        except Exception:
+            raise AttributeError("problem processing file input -- is this",
+                                 "a raster file?")
+        if (_raster_file.RasterYSize, _raster_file.RasterXSize) != shape:
+            raise ValueError("file= dimensions don't match the "
+                             "specialized shape %s" % (shape,))
+        if self._using_disc_caching is not None:
+            # our (random) cache file lives and dies with this Raster
+            _cache = self._using_disc_caching
+            self._release_disc_cache()
+            self._using_disc_caching = _cache
+            _buffer = np.lib.format.open_memmap(
+                self._using_disc_caching, dtype=dtype, mode='w+', shape=shape
+            )
+            _DISC_CACHE_REFS[self._using_disc_caching] = 1
+            _madvise(_buffer, "sequential")
+            _read_band_into(_raster_file, _buffer, buf_type=_gdal_type)
+            _madvise(_buffer, "random")
+        else:
+            _buffer = _read_band_into(
+                _raster_file,
+                np.empty(shape, dtype=dtype),
+                buf_type=_gdal_type
+            )
+        del _raster_file
+        self.array = _buffer
+
+    def _to_georaster(self):
+        return GeoRaster(
+            self.array,
+            self.geot,
+            nodata_value=ndv,
+            projection=self.projection,
+            datatype=dtype
+        )
+
+    _name = "%s_%s_%sx%s" % (base.__name__, dtype.name, shape[0], shape[1])
+    return type(_name, (base,), {
+        '__init__': __init__,
+        'open': _open,
+        'to_georaster': _to_georaster
+    })
 
 
 def crop(*args):
@@ -275,11 +790,12 @@ def extract(*args):
     :return:
     """
 
-def binary_reclassify(array=None, match=None, *args):
+def binary_reclassify(array=None, match=None, *args, out=None):
     """
     Generalized version of binary_reclassify that can accomodate
     a local numpy array or processing on EE
     :param args:
+    :param out: optional (pre-allocated) array to write our result into
     :return:
     """
     _backend = 'local'
@@ -300,20 +816,276 @@ def binary_reclassify(array=None, match=None, *args):
         array = array.to_georaster()
     elif isinstance(array, GeoRaster):
         _backend = 'local'
-    elif isinstance(array, np.array):
+    elif isinstance(array, np.ndarray):
         _backend = 'local'
     else:
         _backend = 'unknown'
 
     if _backend == "local":
-        return _local_binary_reclassify(array, match)
+        return _local_binary_reclassify(array, match, out=out)
     else:
         raise NotImplementedError("Currently only local binary "
                                   "reclassification is supported")
 
 
+def slope(raster=None, disc_caching=None, engine=None):
+    """
+    Calculate slope (in radians) from a digital elevation model using
+    central differences (one-sided at the edges, like np.gradient).
+    :param raster: a Raster object containing elevation values
+    :param disc_caching: write our result to a disc cache, rather than RAM
+    :param engine: 'numba', 'numexpr', or 'scipy' (default: the first
+    one installed, in that order)
+    :return: Raster
+    """
+    # args[0]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument provided by user")
+    _slope = _local_terrain_raster(raster, disc_caching=disc_caching)
+    _local_slope_aspect(raster, out_slope=_slope.data, engine=engine)
+    return _slope
+
+
+def aspect(raster=None, disc_caching=None, engine=None):
+    """
+    Calculate aspect (in radians) from a digital elevation model using
+    central differences (one-sided at the edges, like np.gradient).
+    :param raster: a Raster object containing elevation values
+    :param disc_caching: write our result to a disc cache, rather than RAM
+    :param engine: 'numba', 'numexpr', or 'scipy' (default: the first
+    one installed, in that order)
+    :return: Raster
+    """
+    # args[0]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument provided by user")
+    _aspect = _local_terrain_raster(raster, disc_caching=disc_caching)
+    _local_slope_aspect(raster, out_aspect=_aspect.data, engine=engine)
+    return _aspect
+
+
+def _local_terrain_raster(raster=None, dtype=_TERRAIN_PRECISION,
+                          disc_caching=None):
+    """
+    Build an empty Raster with the same georeferencing and dimensions as
+    raster= that slope/aspect can write into in-place. Only this output
+    is ever disc cached -- we don't keep any intermediate arrays around.
+    """
+    # args[0]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument specified")
+    _out = Raster(dtype=dtype, disc_caching=disc_caching)
+    _out.backend = raster.backend
+    _out.ndv = _TERRAIN_NA_VALUE
+    _out.x_cell_size = raster.x_cell_size
+    _out.y_cell_size = raster.y_cell_size
+    _out.geot = raster.geot
+    _out.projection = raster.projection
+    if _out._using_disc_caching is not None:
+        _buffer = np.lib.format.open_memmap(
+            _out._using_disc_caching, dtype=dtype, mode='w+',
+            shape=raster.data.shape
+        )
+        _DISC_CACHE_REFS[_out._using_disc_caching] = 1
+    else:
+        _buffer = np.empty(raster.data.shape, dtype=dtype)
+    _out.array = _buffer
+    return _out
+
+
+def _local_slope_aspect(raster=None, out_slope=None, out_aspect=None,
+                        engine=None):
+    """
+    Fill out_slope and/or out_aspect (preallocated arrays) from the
+    elevation values in raster=. Slope and aspect don't care about
+    our no data mask, so we work on the raw array and just flag cells
+    that were no data in the source as _TERRAIN_NA_VALUE.
+    """
+    # args[0]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument specified")
+    # args[3]/engine=
+    if engine is None:
+        engine = 'numba' if _HAVE_NUMBA else \
+            'numexpr' if _HAVE_NUMEXPR else 'scipy'
+    if engine not in ('numba', 'numexpr', 'scipy'):
+        raise ValueError("engine= should be one of 'numba', 'numexpr', "
+                         "or 'scipy'")
+    if engine == 'numba' and not _HAVE_NUMBA:
+        raise ImportError("engine='numba' requested, but we failed to "
+                          "import numba")
+    if engine == 'numexpr' and not _HAVE_NUMEXPR:
+        raise ImportError("engine='numexpr' requested, but we failed to "
+                          "import numexpr")
+    # cast once to float32 -- halving the bytes we move through this
+    # (memory-bound) pipeline versus letting numpy promote to float64
+    _dx, _dy = _cell_spacing(raster)
+    _dx, _dy = _TERRAIN_PRECISION(_dx), _TERRAIN_PRECISION(_dy)
+    # we scan a disc cached elevation array front-to-back exactly once,
+    # so let the kernel read ahead (and go back to random access after)
+    _sequential = _madvise(raster.data, "sequential")
+    _elevation = np.ascontiguousarray(raster.data, dtype=_TERRAIN_PRECISION)
+    if _sequential:
+        _madvise(raster.data, "random")
+    if engine == 'numba':
+        # numba wants concrete arrays, even for the output we skip
+        _empty = np.empty((0, 0), dtype=_TERRAIN_PRECISION)
+        _numba_slope_aspect(
+            _elevation, _dx, _dy, _TERRAIN_PRECISION(raster.ndv),
+            _TERRAIN_NA_VALUE,
+            out_slope is not None, out_aspect is not None,
+            _empty if out_slope is None else out_slope,
+            _empty if out_aspect is None else out_aspect
+        )
+        return
+    # separable central differences along each axis with scipy's C
+    # correlation loops. 'nearest' mode halves the one-sided difference
+    # at our edges, so double those to match np.gradient
+    _gx = ndimage.correlate1d(_elevation, _CENTRAL_DIFFERENCE, axis=1,
+                              mode='nearest')
+    _gx[:, [0, -1]] *= 2
+    _gx /= _dx
+    _gy = ndimage.correlate1d(_elevation, _CENTRAL_DIFFERENCE, axis=0,
+                              mode='nearest')
+    _gy[[0, -1], :] *= 2
+    _gy /= _dy
+    if engine == 'numexpr':
+        # fuse the trig and our no data check into one multi-threaded,
+        # cache-blocked pass per output
+        _local_dict = {
+            'e': _elevation, 'gx': _gx, 'gy': _gy,
+            'ndv': _TERRAIN_PRECISION(raster.ndv),
+            'out_ndv': _TERRAIN_PRECISION(_TERRAIN_NA_VALUE)
+        }
+        if out_slope is not None:
+            ne.evaluate('where(e == ndv, out_ndv, arctan(sqrt(gx*gx + gy*gy)))',
+                        local_dict=_local_dict, out=out_slope,
+                        casting='same_kind')
+        if out_aspect is not None:
+            ne.evaluate('where(e == ndv, out_ndv, arctan2(-gx, gy))',
+                        local_dict=_local_dict, out=out_aspect,
+                        casting='same_kind')
+        return
+    # every ufunc below writes straight into our output (or re-uses
+    # a gradient buffer) so we never allocate a full-sized temporary
+    _nodata = np.equal(_elevation, raster.ndv)
+    if out_slope is not None:
+        np.hypot(_gx, _gy, out=out_slope)
+        np.arctan(out_slope, out=out_slope)
+        np.copyto(out_slope, _TERRAIN_NA_VALUE, where=_nodata)
+    if out_aspect is not None:
+        np.negative(_gx, out=_gx)
+        np.arctan2(_gx, _gy, out=out_aspect)
+        np.copyto(out_aspect, _TERRAIN_NA_VALUE, where=_nodata)
+
+
+if _HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _numba_slope_aspect(a, dx, dy, ndv, out_ndv, do_slope, do_aspect,
+                            out_slope, out_aspect):
+        # fused gradient + trig kernel -- a single pass over the
+        # elevation array with no intermediate (full-sized) arrays
+        rows, cols = a.shape
+        for i in prange(rows):
+            for j in range(cols):
+                if a[i, j] == ndv:
+                    if do_slope:
+                        out_slope[i, j] = out_ndv
+                    if do_aspect:
+                        out_aspect[i, j] = out_ndv
+                    continue
+                # central differences in the interior and one-sided
+                # differences at the edges, mirroring np.gradient
+                if cols < 2:
+                    gx = 0.0
+                elif j == 0:
+                    gx = (a[i, 1] - a[i, 0]) / dx
+                elif j == cols - 1:
+                    gx = (a[i, j] - a[i, j - 1]) / dx
+                else:
+                    gx = (a[i, j + 1] - a[i, j - 1]) / (2 * dx)
+                if rows < 2:
+                    gy = 0.0
+                elif i == 0:
+                    gy = (a[1, j] - a[0, j]) / dy
+                elif i == rows - 1:
+                    gy = (a[i, j] - a[i - 1, j]) / dy
+                else:
+                    gy = (a[i + 1, j] - a[i - 1, j]) / (2 * dy)
+                if do_slope:
+                    out_slope[i, j] = np.arctan(np.sqrt(gx * gx + gy * gy))
+                if do_aspect:
+                    out_aspect[i, j] = np.arctan2(-gx, gy)
+
+
+def _cell_spacing(raster=None):
+    """
+    Parse our (x, y) cell spacing from a Raster's geographic
+    transformation, defaulting to unit spacing if it isn't georeferenced
+    """
+    if raster.geot is None:
+        return 1.0, 1.0
+    return abs(float(raster.geot[1])), abs(float(raster.geot[5]))
+
+
+# below this many match values, one vectorized == pass per value beats a
+# lookup-table gather (np.take isn't SIMD); above it, the gather's flat
+# cost wins. Both beat np.isin, whose speed swings with the data. On a
+# 4000x4000 uint8 raster (numpy 2.4): compares take ~1.2ms for one value
+# and ~18ms for 8, the gather ~41ms for any number of values, and
+# np.isin 26-240ms for 3 values
+_RECLASS_MAX_COMPARES = 8
+
+
+@functools.lru_cache(maxsize=32)
+def _reclass_values(dtype=None, match=None):
+    """ the values of match that a (<= 16-bit) integer dtype can hold --
+    anything else can't match """
+    _info = np.iinfo(np.dtype(dtype))
+    _match = np.asarray(match, dtype=np.float64).ravel()
+    _match = _match[(_match >= _info.min) & (_match <= _info.max) &
+                    (_match == np.round(_match))]
+    return tuple(int(v) for v in np.unique(_match))
+
+
+@functools.lru_cache(maxsize=32)
+def _reclass_lut(dtype=None, values=None, invert=False, out_dtype='|u1'):
+    """ lookup table mapping every value of a (<= 16-bit) integer dtype
+    -- indexed by its unsigned view -- to 1 where it is in values (or not
+    in values, if invert) and 0 elsewhere. Read-only, so it can be shared
+    across calls """
+    dtype = np.dtype(dtype)
+    _lut = np.zeros(2 ** (8 * dtype.itemsize), dtype=np.bool_)
+    _lut[np.array(values, dtype=dtype).view('u%d' % dtype.itemsize)] = True
+    if invert:
+        _lut = ~_lut
+    _lut = _lut.astype(out_dtype)
+    _lut.flags.writeable = False
+    return _lut
+
+
+def _compare_reclassify(raster=None, values=None, invert=False, out=None):
+    """ boolean array of the cells of raster equal to any of values, built
+    with one vectorized comparison per value (into out=, if given) """
+    _matches = np.zeros(raster.shape, dtype=np.bool_) if out is None \
+        else out
+    if not values:
+        _matches[...] = False
+    _equal = np.empty(raster.shape, dtype=np.bool_) if len(values) > 1 \
+        else None
+    for i, value in enumerate(values):
+        if i == 0:
+            np.equal(raster, value, out=_matches)
+        else:
+            np.equal(raster, value, out=_equal)
+            np.logical_or(_matches, _equal, out=_matches)
+    if invert:
+        np.logical_not(_matches, out=_matches)
+    return _matches
+
+
 def _local_binary_reclassify(raster=None, match=None, invert=None,
-                             dtype=np.uint8):
+                             dtype=np.uint8, out=None):
     """ binary reclassification of input data. All cell values in
     a numpy array are reclassified as uint8 (boolean) based on
     whether they match or do not match the values of an input match
@@ -322,6 +1094,7 @@ def _local_binary_reclassify(raster=None, match=None, invert=None,
     :param: args1 : a list object of integers specifying match values for
     :param: raster : keyword version of args0
     :param: match : keyword version of args1
+    :param: out : optional (pre-allocated) array to write our result into
     """
     # args[0]/raster=
     if raster is None:
@@ -341,26 +1114,60 @@ def _local_binary_reclassify(raster=None, match=None, invert=None,
     # to process the whole object
     if isinstance(raster, GeoRaster):
         raster = raster.raster
-        return np.reshape(
-            np.array(
-                np.in1d(raster, match, assume_unique=True, invert=invert),
-                dtype=dtype
-            ),
-            raster.shape
-        )
-    # if this is a big raster that we've split into chunks
-    # process this piece-wise
+    if isinstance(raster, np.ndarray):
+        # small integer rasters (e.g., NASS CDL) get a few vectorized
+        # comparisons or a single lookup-table gather, rather than
+        # np.isin -- see _RECLASS_MAX_COMPARES
+        if raster.dtype.kind in 'iu' and raster.dtype.itemsize <= 2:
+            _values = _reclass_values(raster.dtype.str, tuple(match))
+            _direct = out is not None and out.shape == raster.shape and \
+                out.flags.c_contiguous
+            if len(_values) <= _RECLASS_MAX_COMPARES:
+                # 0/1 bytes can be written straight into a 1-byte out=
+                if _direct and out.dtype.itemsize == 1:
+                    _compare_reclassify(raster, _values, invert,
+                                        out=out.view(np.bool_))
+                    return out
+                _matches = _compare_reclassify(raster, _values, invert)
+            else:
+                _lut = _reclass_lut(raster.dtype.str, _values, invert,
+                                    np.dtype(dtype).str)
+                _index = raster.view('u%d' % raster.dtype.itemsize)
+                # our index can't exceed our table, so mode='clip' lets
+                # numpy gather straight into out=, without buffering
+                if _direct and out.dtype == _lut.dtype:
+                    return np.take(_lut, _index, out=out, mode='clip')
+                _matches = np.take(_lut, _index, mode='clip')
+                if out is not None:
+                    np.copyto(out, _matches, casting='unsafe')
+                    return out
+                return _matches
+        else:
+            _matches = np.isin(raster, match, invert=invert)
+        if out is not None:
+            np.copyto(out, _matches, casting='unsafe')
+            return out
+        # a boolean array already holds 0/1 bytes -- re-label it, rather
+        # than copying it, when we can
+        if np.dtype(dtype).itemsize == 1:
+            return _matches.view(dtype)
+        return _matches.astype(dtype)
+    # if this is a big raster that we've split into (window, tile)
+    # chunks with _local_process_array_as_blocks, process piece-wise
+    # and stitch the tiles back together
     elif isinstance(raster, types.GeneratorType):
-        return np.concatenate(
-            [np.reshape(
-                np.array(
-                    np.in1d(d[0], match, assume_unique=True, invert=invert),
-                    dtype=dtype
-                ),
-                (1, d.shape[1])  # array shape tuple e.g., (1,1111)
-             )
-             for i, d in enumerate(raster)]
+        _tiles = [
+            (w, np.array(np.isin(d, match, invert=invert), dtype=dtype))
+            for w, d in raster
+        ]
+        _result = np.empty(
+            (max(w[0] + w[2] for w, d in _tiles),
+             max(w[1] + w[3] for w, d in _tiles)),
+            dtype=dtype
         )
+        for w, d in _tiles:
+            _result[w[0]:w[0] + w[2], w[1]:w[1] + w[3]] = d
+        return _result
     else:
         raise ValueError("raster= input should be a Raster, GeoRaster, or",
                          "Generator that numpy can work with")
@@ -380,11 +1187,11 @@ def _local_crop(raster=None, shape=None, *args):
         raise IndexError("invalid shape=argument specified")
     # sanity check and then do our crop operation
     # and return to user
-    _enough_ram = _local_ram_sanity_check(raster.array)
+    _enough_ram = _local_ram_sanity_check(raster)
     if not _enough_ram['available'] and not raster._using_disc_caching:
         logger.warning(" There doesn't apprear to be enough free memory"
                        " available for our raster operation. You should use"
-                       "disc caching options with your dataset. Est Megabytes "
+                       " disc caching options with your dataset. Est Megabytes "
                        "needed: %s", -1*_enough_ram['bytes']*0.0000001)
     return raster.to_georaster().clip(shape)
 
@@ -423,13 +1230,64 @@ def _ee_extract(*args):
     :param args:
     :return:
     """
-    if not _HAVE_EE:
+    try:
+        _import_ee()
+    except ImportError:
         raise AttributeError("Requested Earth Engine functionality, "
                              "but we failed to load and initialize the ee package.")
 
 
-def _local_reproject(*args):
-    pass
+def _local_reproject(raster=None, dst_srs=None, resample_alg=None):
+    """
+    Reproject a Raster in-process with gdal.Warp. Our source is wrapped
+    as an in-memory (MEM) dataset and we warp to another MEM dataset, so
+    nothing touches the disc and we don't pay for a gdalwarp subprocess.
+    :param raster: a Raster object
+    :param dst_srs: target spatial reference (WKT, PROJ.4, or 'EPSG:n')
+    :param resample_alg: GDAL resampling algorithm name (default: near)
+    :return: Raster
+    """
+    # args[0]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument specified")
+    # args[1]/dst_srs=
+    if dst_srs is None:
+        raise IndexError("invalid dst_srs= argument specified")
+    # args[2]/resample_alg=
+    if resample_alg is None:
+        resample_alg = 'near'
+    _rows, _cols = raster.data.shape
+    _gdal_type = gdal_array.NumericTypeCodeToGDALTypeCode(
+        raster.data.dtype.type
+    )
+    _src = gdal.GetDriverByName('MEM').Create('', _cols, _rows, 1, _gdal_type)
+    _src.SetGeoTransform(raster.geot)
+    _src.SetProjection(raster.projection_wkt)
+    _src.GetRasterBand(1).SetNoDataValue(raster.ndv)
+    _src.GetRasterBand(1).WriteArray(np.ma.filled(
+        raster._array if raster._array is not None else raster.data,
+        raster.ndv
+    ))
+    _dst = gdal.Warp(
+        '', _src, format='MEM', dstSRS=dst_srs,
+        srcNodata=raster.ndv, dstNodata=raster.ndv,
+        resampleAlg=resample_alg, multithread=True,
+        warpOptions=['NUM_THREADS=ALL_CPUS']
+    )
+    if _dst is None:
+        raise OSError("gdal failed to reproject our raster")
+    _out = Raster(dtype=raster.data.dtype)
+    _out.backend = raster.backend
+    _out.ndv, _out.x_cell_size, _out.y_cell_size, _out.geot, \
+        _out.projection, _ = _get_geo_info(_dst)
+    _out.ndv = raster.ndv
+    _out.array = _read_band_into(
+        _dst,
+        np.empty((_dst.RasterYSize, _dst.RasterXSize),
+                 dtype=raster.data.dtype)
+    )
+    del _src, _dst
+    return _out
 
 
 def _local_merge(rasters=None):
@@ -443,10 +1301,13 @@ def _local_merge(rasters=None):
 
 
 
-def _local_split(raster=None, n=None):
+def _local_split(raster=None, n=None, shared=None):
     """
     Stump for np._array_split. splits an input array into n (mostly) equal segments,
-    possibly for a future parallel operation.
+    possibly for a parallel operation (see map_over_splits). If shared=True, the raster should
+    be disc cached and we yield (handle, row_slice) tuples instead of array
+    chunks so that process pool workers can re-open the cache read-only
+    (see _from_shared_handle) rather than pickling our array.
     """
     # args[0]/raster=
     if raster is None:
@@ -454,25 +1315,100 @@ def _local_split(raster=None, n=None):
     #args[1]/n=
     if n is None:
         raise IndexError("invalid n= argument specified")
-    return np.array_split(
-        np.array(raster.array, dtype=str(raster.array.data.dtype)),
-        n
-    )
+    # args[2]/shared=
+    if shared:
+        _handle = raster.shared_handle()
+        _bounds = np.linspace(0, _handle['shape'][0], n + 1).astype(int)
+        return [(_handle, slice(_bounds[i], _bounds[i + 1]))
+                for i in range(n)]
+    # split our raw array -- array_split returns views, so we don't
+    # copy (or build a mask for) the whole raster just to chunk it
+    return np.array_split(raster.data, n)
 
 
-def _local_ram_sanity_check(array=None):
+def map_over_splits(function=None, raster=None, n=None, backend=None):
+    """
+    Apply function to n (mostly) equal row chunks of an array concurrently
+    and return a list of the results, in order. Chunks are views, so for a
+    disc cached Raster each worker reads straight from the shared memmap
+    and no data is copied between workers.
+    :param function: function accepting a numpy array
+    :param raster: a Raster, GeoRaster, or numpy array
+    :param n: number of chunks (default: os.cpu_count())
+    :param backend: 'threads' (default) runs function on each chunk in a
+    thread pool -- most numpy ufuncs release the GIL, so this scales with
+    cores. 'prange' is for numba kernels compiled with parallel=True,
+    which already parallelize internally, so we just call function once
+    on the whole array.
+    :return: list
+    """
+    # args[0]/function=
+    if function is None:
+        raise IndexError("invalid function= argument specified")
+    # args[1]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument specified")
+    # args[3]/backend=
+    if backend is None:
+        backend = 'threads'
+    if backend not in ('threads', 'prange'):
+        raise ValueError("backend= should be either 'threads' or 'prange'")
+    if isinstance(raster, Raster):
+        _array = raster.data
+    elif isinstance(raster, GeoRaster):
+        _array = raster.raster
+    else:
+        _array = raster
+    if backend == 'prange':
+        return [function(_array)]
+    # args[2]/n=
+    if n is None:
+        n = os.cpu_count()
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as _executor:
+        return list(_executor.map(function, np.array_split(_array, n)))
+
+
+def _from_shared_handle(handle=None, row_slice=None):
+    """
+    Re-open a disc cache described by Raster.shared_handle() read-only
+    as a masked array. This is zero-copy -- the OS shares the cache pages
+    between every process that maps it.
+    :param handle: dict returned by Raster.shared_handle()
+    :param row_slice: optional slice of rows to return
+    :return: np.ma.MaskedArray
+    """
+    # args[0]/handle=
+    if handle is None:
+        raise IndexError("invalid handle= argument specified")
+    # our caches are .npy files, so shape and dtype come from the header
+    _array = np.load(handle['path'], mmap_mode='r')
+    # args[1]/row_slice=
+    if row_slice is not None:
+        _array = _array[row_slice]
+    return np.ma.masked_equal(_array, handle['ndv'], copy=False)
+
+
+def _local_ram_sanity_check(array=None, as_bool=None):
+    """
+    Compare the estimated size of array against our free RAM.
+    :param array: Raster object, GeoRaster, numpy array, or shape tuple
+    :param as_bool: if True, just return whether array fits in RAM
+    :return: dict {'available': bool, 'bytes': int} or bool
+    """
     # args[0] (Raster object, GeoRaster, or numpy array)
     if array is None:
         raise IndexError("first pos. argument should be some kind of "
                          "raster data")
 
     _cost = _est_free_ram() - _est_array_size(array)
+    # args[1]/as_bool=
+    if as_bool:
+        return _cost > 0
     return {
         'available': bool(_cost > 0),
         'bytes': int(_cost)
     }
 
-
 def _est_free_ram():
     """
     Shorthand for psutil that will determine the amount of free ram
@@ -484,63 +1420,487 @@ def _est_free_ram():
     return psutil.virtual_memory().free
 
 
-def _est_array_size(obj=None, byte_size=None, dtype=None):
+def _est_array_size(obj=None, dtype=None):
     """
-
-    :param args:
-    :return:
+    Estimate the size (in bytes) of an array without copying it
+    :param obj: Raster object, GeoRaster, numpy array, or a list/tuple
+    of array dimensions
+    :param dtype: data type to assume for a list/tuple of dimensions
+    (default: _DEFAULT_PRECISION)
+    :return: int
     """
-    # args[0] is a list containing array dimensions
-    if isinstance(obj, list) or isinstance(obj, tuple):
-        _array_len = np.prod(obj)
+    # args[0] is a numpy array (or a masked array) -- numpy knows
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    # args[0] is a Raster object -- size our raw array, so we don't
+    # build a mask just to measure it
+    elif isinstance(obj, Raster):
+        return int(obj.data.nbytes)
     # args[0] is a GeoRaster object
     elif isinstance(obj, GeoRaster):
-        dtype = obj.datatype
-        _array_len = np.prod(obj.shape)
-        _byte_size = NUMPY_TYPES[obj.datatype.lower()](1)
-    # args[0] is a Raster object
-    elif isinstance(obj, Raster):
-        dtype = obj.array.dtype
-        _array_len = np.prod(obj.array.shape)
-        _byte_size = NUMPY_TYPES[obj.array.dtype.lower()](1)
-    # args[0] is something else?
+        return int(obj.raster.nbytes)
+    # args[0] is a list containing array dimensions
+    elif isinstance(obj, (list, tuple)):
+        # args[1]/dtype=
+        if dtype is None:
+            dtype = _DEFAULT_PRECISION
+        return int(np.prod(obj)) * _to_numpy_type(dtype).itemsize
     else:
-        _array_len = len(obj)
-    # args[1]/dtype= argument was specified
-    if dtype is not None:
-        _byte_size = NUMPY_TYPES[dtype.lower()](1)
+        raise IndexError("invalid obj= argument specified; expected an "
+                         "array, Raster, GeoRaster, or shape tuple")
+
+@functools.lru_cache(maxsize=128)
+def _to_numpy_type(dtype=None):
+    """
+    Resolve a dtype specification -- a NUMPY_TYPES key, a GDAL type name
+    like 'UInt16', a numpy scalar type, or a np.dtype -- as a np.dtype
+    instance. Results are cached, so repeat lookups in tile loops are a
+    single dict hit.
+    :param dtype: string, numpy type, or np.dtype
+    :return: np.dtype
+    """
+    # args[0]/dtype=
+    if dtype is None:
+        raise IndexError("invalid dtype= argument specified")
+    if isinstance(dtype, str):
+        try:
+            return _NUMPY_TYPE_ALIASES[dtype.strip().lower()]
+        except KeyError:
+            raise KeyError("unknown dtype= string: " + str(dtype))
+    return np.dtype(dtype)
+
+
+def _local_process_array_as_blocks(raster=None, tile_rows=None,
+                                   tile_cols=None, target_bytes=None,
+                                   function=None, parallel=None):
+    """
+    Split an array into cache-sized tiles and yield (window, tile)
+    pairs, where window is (row_off, col_off, rows, cols) and tile is a
+    view of the source array. By default tiles are sized so each fits in
+    L2 cache. Disc-cached (memmap) arrays are split into full-width row
+    strips instead, so every tile is one contiguous run of pages.
+    :param raster: a Raster, GeoRaster, or numpy array
+    :param tile_rows: rows per tile (default: derived from target_bytes)
+    :param tile_cols: cols per tile (default: derived from target_bytes)
+    :param target_bytes: approximate size of each tile in bytes
+    :param function: optional function to apply to each tile; if given,
+    we yield (window, function(tile)) pairs instead
+    :param parallel: apply function= to tiles using a pool of threads
+    (most numpy ufuncs release the GIL)
+    :return: generator
+    """
+    # args[0]/raster=
+    if raster is None:
+        raise IndexError("invalid raster= argument specified")
+    if isinstance(raster, Raster):
+        _array = raster.data
+    elif isinstance(raster, GeoRaster):
+        _array = raster.raster
+    else:
+        _array = np.asarray(raster) if not isinstance(raster, np.ndarray) \
+            else raster
+    # args[3]/target_bytes=
+    if target_bytes is None:
+        target_bytes = _DEFAULT_TILE_BYTES
+    _rows, _cols = _array.shape
+    _itemsize = _array.dtype.itemsize
+    if tile_rows is None and tile_cols is None:
+        if isinstance(_array, np.memmap):
+            tile_cols = _cols
+            tile_rows = max(1, target_bytes // (_cols * _itemsize))
+        else:
+            tile_rows = tile_cols = \
+                max(1, int(np.sqrt(target_bytes // _itemsize)))
+    elif tile_rows is None:
+        tile_rows = max(1, target_bytes // (tile_cols * _itemsize))
+    elif tile_cols is None:
+        tile_cols = max(1, target_bytes // (tile_rows * _itemsize))
+    _windows = _block_windows(
+        (_rows, _cols), (min(tile_rows, _rows), min(tile_cols, _cols))
+    )
+
+    def _view(window):
+        return _array[window[0]:window[0] + window[2],
+                      window[1]:window[1] + window[3]]
+
+    # args[4]/function=
+    if function is None:
+        for _window in _windows:
+            yield _window, _view(_window)
+    # args[5]/parallel=
+    elif parallel:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as _executor:
+            for _window, _result in _executor.map(
+                    lambda w: (w, function(_view(w))), _windows):
+                yield _window, _result
     else:
-        raise IndexError("couldn't assign a default data type and an invalid ",
-                         "dtype= argument specified")
-    return _array_len * sys.getsizeof(_byte_size)
+        for _window in _windows:
+            yield _window, function(_view(_window))
 
 
-def _local_process_array_as_blocks(*args):
+if _HAVE_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _numba_build_mask(data, ndv, out):
+        for i in prange(data.size):
+            out[i] = data[i] == ndv
+
+
+def _build_mask(data=None, ndv=None):
     """
-    Accepts
-    :param args:
-    :return:
+    Build a boolean no data mask for an array. The comparison is
+    embarrassingly parallel and memory-bound, so if numba is available
+    we scan with a multi-threaded kernel instead of numpy's single
+    threaded ufunc. If the ndv can't occur in data (e.g., it's None or
+    out of range for an integer dtype), or no cell actually matches it,
+    we return np.ma.nomask and skip (or drop) the boolean array.
+    :param data: numpy array (or memmap)
+    :param ndv: no data value
+    :return: boolean numpy array shaped like data, or np.ma.nomask
+    """
+    if ndv is None:
+        return np.ma.nomask
+    data = np.asarray(data)
+    if data.dtype.kind in 'uif':
+        # we compare in the array's own type, so make sure the ndv
+        # survives the cast before we trust it
+        try:
+            _ndv = data.dtype.type(ndv)
+        except (OverflowError, ValueError, TypeError):
+            _ndv = None
+        if _ndv is None or _ndv != ndv:
+            return np.ma.nomask
+        if _HAVE_NUMBA and data.size > 0:
+            _mask = np.empty(data.shape, dtype=np.bool_)
+            _numba_build_mask(np.ravel(data), _ndv, _mask.reshape(-1))
+        else:
+            _mask = np.equal(data, _ndv)
+    else:
+        _mask = np.equal(data, ndv)
+    # an all-False mask costs a byte per cell and slows down every
+    # masked operation, so don't keep one around
+    if not np.any(_mask):
+        return np.ma.nomask
+    return _mask
+
+def _block_windows(shape=None, block_shape=None):
+    """
+    Yield (row_off, col_off, rows, cols) windows that tile an array of
+    some shape in row-major order. Windows along the right and bottom
+    edges are clipped to the array.
+    :param shape: (rows, cols) of the array we are tiling
+    :param block_shape: (rows, cols) of each block
+    :return: generator
+    """
+    # args[0]/shape=
+    if shape is None:
+        raise IndexError("invalid shape= argument specified")
+    # args[1]/block_shape=
+    if block_shape is None:
+        block_shape = _DEFAULT_BLOCK_SHAPE
+    _rows, _cols = shape
+    _block_rows, _block_cols = block_shape
+    for _row in range(0, _rows, _block_rows):
+        for _col in range(0, _cols, _block_cols):
+            yield (_row, _col, min(_block_rows, _rows - _row),
+                   min(_block_cols, _cols - _col))
+
+
+def _create_geotiff(dst_filename=None, shape=None, format=gdal.GDT_UInt16,
+                    driver=None, block_shape=None, geot=None,
+                    projection=None):
+    """
+    Create an empty, single band (tiled, deflate-compressed) GeoTIFF that
+    callers can fill one block at a time
+    :param dst_filename: output filename ('.tif' is appended if the
+    name doesn't already have a GeoTIFF extension)
+    :param shape: (rows, cols) of our output
+    :param format: GDAL data type to write
+    :param driver: GDAL driver to write with (default: GTiff)
+    :param block_shape: (rows, cols) of our output tiles
+    :param geot: GDAL geographic transformation
+    :param projection: osr.SpatialReference or WKT string
+    :return: (gdal.Dataset, dst_filename)
+    """
+    # args[0]/dst_filename=
+    if dst_filename is None:
+        raise IndexError("invalid dst_filename= argument specified")
+    # args[1]/shape=
+    if shape is None:
+        raise IndexError("invalid shape= argument specified")
+    if driver is None:
+        driver = gdal.GetDriverByName('GTiff')
+    if block_shape is None:
+        block_shape = _DEFAULT_BLOCK_SHAPE
+    if not dst_filename.lower().endswith(('.tif', '.tiff')):
+        dst_filename = dst_filename + '.tif'
+    _rows, _cols = shape
+    _options = []
+    if driver.ShortName == 'GTiff':
+        # horizontal differencing (2) for integers, floating point
+        # prediction (3) for floats -- both help deflate a lot
+        _predictor = 3 if 'Float' in gdal.GetDataTypeName(format) else 2
+        _options = [
+            'TILED=YES',
+            'BLOCKYSIZE=%d' % block_shape[0],
+            'BLOCKXSIZE=%d' % block_shape[1],
+            'COMPRESS=DEFLATE',
+            'PREDICTOR=%d' % _predictor,
+            'NUM_THREADS=ALL_CPUS'
+        ]
+    # GDAL wants (x, y) -- i.e., (cols, rows)
+    _dataset = driver.Create(dst_filename, _cols, _rows, 1, format,
+                             options=_options)
+    if _dataset is None:
+        raise OSError("gdal failed to create dst_filename= " +
+                      str(dst_filename))
+    if geot is not None:
+        _dataset.SetGeoTransform(geot)
+    if projection is not None:
+        _dataset.SetProjection(
+            projection.ExportToWkt()
+            if hasattr(projection, 'ExportToWkt')
+            else projection
+        )
+    return _dataset, dst_filename
+
+
+def _get_geo_info(dataset=None):
+    """
+    Equivalent of georasters.get_geo_info that reads from an open GDAL
+    dataset, so we don't re-open (and re-parse) a file we already have
+    a handle to
+    :param dataset: an open gdal.Dataset
+    :return: (ndv, x size, y size, geot, projection, GDAL type name)
+    """
+    # args[0]/dataset=
+    if dataset is None:
+        raise IndexError("invalid dataset= argument specified")
+    _band = dataset.GetRasterBand(1)
+    _projection = osr.SpatialReference()
+    _projection.ImportFromWkt(dataset.GetProjectionRef())
+    return (
+        _band.GetNoDataValue(),
+        dataset.RasterXSize,
+        dataset.RasterYSize,
+        dataset.GetGeoTransform(),
+        _projection,
+        gdal.GetDataTypeName(_band.DataType)
+    )
+
+
+def _read_band_into(dataset=None, buffer=None, band=1, buf_type=None,
+                    block_windows=None):
+    """
+    Read a raster band straight into a preallocated numpy array (or
+    memmap) with ReadAsArray(buf_obj=). This avoids the intermediate
+    array that gdalnumeric.LoadFile allocates and we would then copy.
+    :param dataset: an open gdal Dataset
+    :param buffer: numpy array sized (rows, cols) to read into
+    :param band: band number to read (1-indexed)
+    :param buf_type: GDAL type code (default: derived from buffer.dtype)
+    :param block_windows: read one natural block at a time
+    :return: buffer
+    """
+    # args[0]/dataset=
+    if dataset is None:
+        raise IndexError("invalid dataset= argument specified")
+    # args[1]/buffer=
+    if buffer is None:
+        raise IndexError("invalid buffer= argument specified")
+    if buf_type is None:
+        buf_type = gdal_array.NumericTypeCodeToGDALTypeCode(buffer.dtype.type)
+    _band = dataset.GetRasterBand(band)
+    if block_windows:
+        # GDAL's natural blocks are the cheapest unit for it to decode;
+        # read each one straight into its window of our buffer
+        _x_block, _y_block = _band.GetBlockSize()
+        for _row, _col, _rows, _cols in _block_windows(
+                buffer.shape, (_y_block, _x_block)):
+            _band.ReadAsArray(
+                _col, _row, _cols, _rows,
+                buf_obj=buffer[_row:_row + _rows, _col:_col + _cols],
+                buf_type=buf_type
+            )
+    else:
+        _band.ReadAsArray(buf_obj=buffer, buf_type=buf_type)
+    return buffer
+
+
+@functools.lru_cache(maxsize=256)
+def _geot_extent(geot=None, shape=None):
+    """
+    Derive an (xmin, ymin, xmax, ymax) bounding box from a (tuple)
+    geographic transformation and (rows, cols) shape
     """
-    _array = args[0].raster   # numpy array
-    _rows = _array.shape[0]   # rows in array
-    _n_chunks = 1             # how many blocks (rows) per chunk?
-    """Yield successive n-sized chunks from 0-to-nrow."""
-    for i in range(0, _rows, _n_chunks):
-        yield _array[i:i + _n_chunks]
+    # args[0]/geot=
+    if geot is None:
+        raise IndexError("invalid geot= argument specified")
+    _rows, _cols = shape
+    _xs = (geot[0], geot[0] + _cols * geot[1] + _rows * geot[2])
+    _ys = (geot[3], geot[3] + _cols * geot[4] + _rows * geot[5])
+    return min(_xs), min(_ys), max(_xs), max(_ys)
+
+
+@functools.lru_cache(maxsize=256)
+def _extent_box(extent=None):
+    """ Build a shapely box from an (xmin, ymin, xmax, ymax) extent """
+    # args[0]/extent=
+    if extent is None:
+        raise IndexError("invalid extent= argument specified")
+    return box(*extent)
+
+
+@functools.lru_cache(maxsize=256)
+def _geot_affine(geot=None):
+    """ Convert a (tuple) GDAL geographic transformation to an Affine """
+    # args[0]/geot=
+    if geot is None:
+        raise IndexError("invalid geot= argument specified")
+    return Affine.from_gdal(*geot)
+
+
+@functools.lru_cache(maxsize=64)
+def _wkt_to_proj4(wkt=None):
+    """ Convert a WKT projection string to PROJ.4 (cached) """
+    # args[0]/wkt=
+    if wkt is None:
+        raise IndexError("invalid wkt= argument specified")
+    _projection = osr.SpatialReference()
+    _projection.ImportFromWkt(wkt)
+    return _projection.ExportToProj4()
+
+
+def _band_descriptions(dataset=None):
+    """
+    Fetch the description of every band in an open GDAL dataset with
+    one GetDescription() call per band, rather than parsing gdal.Info
+    :param dataset: an open gdal.Dataset
+    :return: list of strings
+    """
+    # args[0]/dataset=
+    if dataset is None:
+        raise IndexError("invalid dataset= argument specified")
+    return [dataset.GetRasterBand(i + 1).GetDescription()
+            for i in range(dataset.RasterCount)]
+
+
+def _gdal_path(file=None):
+    """
+    Translate a remote URL (http, https, or s3) into a GDAL virtual file
+    system path, so GDAL reads it with range requests rather than
+    fetching the whole file. Local paths are returned unchanged.
+    :param file: path or URL to a raster file
+    :return: string
+    """
+    # args[0]/file=
+    if file is None:
+        raise IndexError("invalid file= argument specified")
+    for _scheme, _prefix in _REMOTE_SCHEMES.items():
+        if file.lower().startswith(_scheme):
+            # /vsis3/ wants bucket/key, /vsicurl/ wants the full URL
+            return _prefix + (file[len(_scheme):] if _prefix == '/vsis3/'
+                              else file)
+    return file
+
+
+@contextlib.contextmanager
+def _gdal_config(options=None):
+    """
+    Set GDAL configuration options for the duration of a with block, and
+    restore whatever was set before on the way out
+    :param options: dict of {option: value}
+    """
+    _previous = {k: gdal.GetConfigOption(k) for k in options}
+    try:
+        for _option, _value in options.items():
+            gdal.SetConfigOption(_option, _value)
+        yield
+    finally:
+        for _option, _value in _previous.items():
+            gdal.SetConfigOption(_option, _value)
+
+
+def _gdal_open(file=None):
+    """
+    gdal.Open a local path or remote URL (see _gdal_path). Remote rasters
+    are opened with _REMOTE_CONFIG_OPTIONS set; local files keep GDAL's
+    defaults (e.g., .aux.xml, .ovr, and world file discovery).
+    :param file: path or URL to a raster file
+    :return: gdal.Dataset, or None if GDAL couldn't open it
+    """
+    _path = _gdal_path(file)
+    if _path == file:
+        return gdal.Open(_path)
+    with _gdal_config(_REMOTE_CONFIG_OPTIONS):
+        return gdal.Open(_path)
+
+
+def _disc_cache_filename(file=None, dtype=None):
+    """
+    Build a content-addressed disc cache filename from the absolute path,
+    modification time, and size of a source raster (and the dtype we
+    cache it as), so that a cache can be shared and re-used by every
+    Raster opened on the same unchanged file.
+    :param file: full path to a raster file
+    :param dtype: numpy type we are caching the raster as
+    :return: string filename
+    """
+    # args[0]/file=
+    if file is None:
+        raise IndexError("invalid file= argument specified")
+    # we can't stat a remote file, so key on the URL itself
+    if _gdal_path(file) != file:
+        _key = "%s:%s" % (file, np.dtype(dtype).str)
+    else:
+        _stat = os.stat(file)
+        _key = "%s:%s:%s:%s" % (os.path.abspath(file), _stat.st_mtime,
+                                _stat.st_size, np.dtype(dtype).str)
+    return hashlib.sha1(_key.encode('utf-8')).hexdigest()[:16] + \
+        '_np_array.npy'
+
+
+def _madvise(array=None, pattern=None):
+    """
+    Shorthand for mmap.madvise that will hint the kernel about how we
+    intend to access a disc-cached (np.memmap) array. This is a no-op
+    for in-memory arrays and on platforms without madvise support.
+    :param array: a np.memmap (or a masked array wrapping one)
+    :param pattern: one of the keys in _MADV_PATTERNS
+    :return: True if the hint was applied, otherwise False
+    """
+    if pattern not in _MADV_PATTERNS:
+        raise ValueError("pattern= should be one of: " +
+                         ", ".join(_MADV_PATTERNS.keys()))
+    _data = np.ma.getdata(array)
+    _mmap = getattr(_data, '_mmap', None)
+    _flag = _MADV_PATTERNS[pattern]
+    if _mmap is None or _flag is None or not hasattr(_mmap, 'madvise'):
+        return False
+    _mmap.madvise(_flag)
+    # prefetch (or drop) our backing file's pages in the page cache, too
+    # -- including pages we haven't mapped in yet
+    _filename = getattr(_data, 'filename', None)
+    _fadv_flag = _FADV_PATTERNS.get(pattern)
+    if _filename is not None and _fadv_flag is not None:
+        _fd = os.open(_filename, os.O_RDONLY)
+        try:
+            os.posix_fadvise(_fd, 0, 0, _fadv_flag)
+        finally:
+            os.close(_fd)
+    return True
 
 
 def _is_number(num_list=None):
     """
-    Shorthand listcomp function that will determine whether any
-    item in a list is not a number.
+    Shorthand function that will determine whether every item in a
+    list (or array) is a number. numpy promotes the whole list in one
+    pass, so we only need to check the resulting dtype.
     :param args[0]: a python list object
-    :return: True on all integers,
+    :return: True on all integers/floats, otherwise False
     """
     try:
-        if np.sum([not(isinstance(i, int) or isinstance(i, float))
-                   for i in num_list]) > 0:
-            return False
-        else:
-            return True
-    except ValueError:
+        _dtype = np.asarray(num_list).dtype
+    except (TypeError, ValueError):
         return False
+    return bool(np.issubdtype(_dtype, np.number)) and \
+        not np.issubdtype(_dtype, np.complexfloating)
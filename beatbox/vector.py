@@ -1,4 +1,3 @@
-
 #!/usr/bin/env python2
 
 __author__ = "Kyle Taylor"
@@ -12,34 +11,83 @@ __status__ = "Testing"
 
 
 import os
-import fiona
-import geopandas as gp
-import pandas as pd
+import re
+import sys
 import json
+import datetime
+import functools
+import itertools
+import logging
+from copy import copy
 
-import pyproj
+import fiona
+import numpy as np
+import pandas as pd
 
 from shapely.geometry import *
-from beatbox.do import Local, EE, Do
+from shapely.geometry.base import BaseGeometry
+from shapely.ops import transform as shapely_transform
+from beatbox.do import Local, EE, _import_ee
 
-import logging
+# shapely 2.x can parse (and write) GeoJSON in a single vectorized (C) call
+try:
+    from shapely import from_geojson, to_geojson, transform, get_coordinates
+    from shapely import linearrings, polygons
+    _HAVE_FROM_GEOJSON = True
+except ImportError:
+    _HAVE_FROM_GEOJSON = False
+# pyogrio reads whole columns through GDAL, rather than a dict per feature
+try:
+    from pyogrio import write_dataframe
+    from pyogrio.raw import read as _pyogrio_read
+    from shapely import from_wkb
+    _HAVE_PYOGRIO = True
+except ImportError:
+    _HAVE_PYOGRIO = False
+# pyshp writes simple shapefiles with less per-record overhead than fiona
+try:
+    import shapefile
+    _HAVE_PYSHP = True
+except ImportError:
+    _HAVE_PYSHP = False
+# orjson is a much faster (optional) drop-in for json.dumps
+try:
+    import orjson
+    _HAVE_ORJSON = True
+except ImportError:
+    _HAVE_ORJSON = False
 
 _DEFAULT_EPSG = 2163
+# fiona schema types -> pyshp (dBase) field types
+_PYSHP_FIELD_TYPES = {
+    'int': 'N',
+    'float': 'F',
+    'str': 'C',
+    'date': 'D',
+    'bool': 'L'
+}
+# features per batch for Vector.iter_file
+_DEFAULT_BATCH_SIZE = 50000
+# leading character of a json object or array, after any whitespace
+_JSON_PREFIX = re.compile(r'\s*[\[{]')
+_JSON_PREFIX_BYTES = re.compile(br'\s*[\[{]')
+
+# fiona schema field types -> numpy dtypes for our attribute table
+_PANDAS_FIELD_TYPES = {
+    'int': np.int64,
+    'float': np.float64,
+}
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Fickle beast handlers for Earth Engine
-try:
-    import ee
-    ee.Initialize()
-except Exception:
-    logger.warning(" Failed to load the Earth Engine API. "
-                   "Check your installation. Will continue "
-                   "to load but without the EE functionality.")
-
 
 class Vector(object):
+    __slots__ = ('_geometries', '_attributes', '_filename', '_schema',
+                 '_crs', '_crs_wkt', '_version', '_gdf_cache')
+    # assigning any of these changes what to_geodataframe() builds
+    _GDF_FIELDS = frozenset(('_geometries', '_attributes', '_crs'))
+
     def __init__(self, filename=None, json=None):
         """Handles file input/output operations for shapefiles \
         using fiona and shapely built-ins and performs select \
@@ -53,44 +101,131 @@ class Vector(object):
         1st= if no filname keyword argument was used,
         attempt to read the first positional argument
         """
-        self._geometries = []
+        # bumped whenever our geometries, attributes, or crs are assigned
+        # (see __setattr__), so we know when our cached GeoDataFrame is
+        # stale -- (GeoDataFrame, _version it was built from)
+        self._version = 0
+        self._gdf_cache = (None, -1)
+        self._geometries = np.empty(0, dtype=object)  # shapely geometries
         self._attributes = {}
         self._filename = []
         self._schema = []
         self._crs = []
         self._crs_wkt = []
         # args[0] / filename= / json=
+        # (if you know what you have, use from_file(), from_json(), or
+        # from_geodataframe() and skip this guesswork)
         if filename is None and json is None:
             pass  # allow an empty specification
+        elif json is not None:
+            self._json_string_to_shapely_geometries(string=json)
+        # our (cheap) leading-character json check goes first, so we
+        # never stat() a (potentially huge) json string as if it's a path
+        elif is_json(filename):
+            self._json_string_to_shapely_geometries(string=filename)
         elif is_valid_file(filename):
             self.filename = filename
-            self.read(filename=self.filename)
-        elif is_json(filename):
-            self.read(filename=filename)
-        elif is_json(json):
-            self.read(json=json)
+            self._read_file(filename)
         # first argument is a GeoPandas object?
-        elif isinstance(filename, gp):
-            self.read(json=filename.to_json())
-            
+        # (if geopandas was never imported, it can't be one)
+        elif 'geopandas' in sys.modules and \
+                isinstance(filename, sys.modules['geopandas'].GeoDataFrame):
+            self._from_geodataframe(filename)
+
+    @classmethod
+    def from_file(cls, filename=None):
+        """
+        Build a Vector from a path to a vector dataset (e.g., a .shp file)
+        :param filename: full path to a vector dataset
+        :return: Vector
+        """
+        # args[0]/filename=
+        if filename is None:
+            raise IndexError("invalid filename= argument specified")
+        _vector = cls()
+        _vector.filename = filename
+        _vector._read_file(filename)
+        return _vector
+
+    @classmethod
+    def from_json(cls, string=None):
+        """
+        Build a Vector from a GeoJSON FeatureCollection string
+        :param string: GeoJSON string
+        :return: Vector
+        """
+        # args[0]/string=
+        if string is None:
+            raise IndexError("invalid string= argument specified")
+        _vector = cls()
+        _vector._json_string_to_shapely_geometries(string=string)
+        return _vector
+
+    @classmethod
+    def from_geodataframe(cls, gdf=None):
+        """
+        Build a Vector from a GeoPandas GeoDataFrame
+        :param gdf: GeoDataFrame
+        :return: Vector
+        """
+        # args[0]/gdf=
+        if gdf is None:
+            raise IndexError("invalid gdf= argument specified")
+        _vector = cls()
+        _vector._from_geodataframe(gdf)
+        return _vector
+
+    def __setattr__(self, name, value):
+        """ invalidate our cached GeoDataFrame whenever our geometries,
+        attributes, or crs are (re-)assigned -- by a setter, or
+        internally """
+        object.__setattr__(self, name, value)
+        if name in Vector._GDF_FIELDS:
+            object.__setattr__(self, '_version',
+                               getattr(self, '_version', 0) + 1)
+
+    def _from_geodataframe(self, gdf=None):
+        """
+        Attach a GeoDataFrame's geometries, attributes, and CRS directly,
+        rather than round-tripping the whole frame through a GeoJSON string
+        :param gdf: GeoDataFrame
+        :return: None
+        """
+        self._geometries = _as_geometry_array(np.asarray(gdf.geometry.values))
+        self._attributes = pd.DataFrame(
+            gdf.drop(columns=gdf.geometry.name), copy=False)
+        if gdf.crs is None:
+            logger.warning("no crs defined for our GeoDataFrame "
+                           "-- assuming EPSG:4326")
+            self._crs = {'init': 'epsg:4326'}
+            return
+        self._crs_wkt = gdf.crs.to_wkt()
+        _epsg = gdf.crs.to_epsg()
+        self._crs = {'init': 'epsg:%d' % _epsg} if _epsg is not None \
+            else self._crs_wkt
 
     def __copy__(self):
         """ simple copy method that creates a new instance of a vector class and assigns \
         default attributes from the parent instance
         """
-        _vector_geom = Vector()
-        _vector_geom._geometries = self._geometries
-        _vector_geom._attributes = self._attributes
-        _vector_geom._crs = self._crs
-        _vector_geom._crs_wkt = self._crs_wkt
-        _vector_geom._schema = self._schema
-        _vector_geom._filename = self._filename
-
+        # skip __init__ and just share references to our parent's data
+        _vector_geom = self.__class__.__new__(self.__class__)
+        for _slot in Vector.__slots__:
+            setattr(_vector_geom, _slot, getattr(self, _slot))
         return _vector_geom
 
     def __deepcopy__(self, memodict={}):
-        """ copy already is a deep copy """
-        return self.__copy__()
+        """
+        Deep copy our geometry array and attribute table. shapely
+        geometries are immutable, so copying the array that holds them is
+        enough, and DataFrame.copy() clones its blocks without re-running
+        DataFrame validation.
+        """
+        _vector_geom = self.__copy__()
+        _vector_geom._geometries = _as_geometry_array(self._geometries).copy()
+        if isinstance(self._attributes, pd.DataFrame):
+            _vector_geom._attributes = self._attributes.copy(deep=True)
+        return _vector_geom
 
     @property
     def filename(self):
@@ -100,10 +235,7 @@ class Vector(object):
     @filename.setter
     def filename(self, *args):
         """ decorated setter for our filename """
-        try:
-            self._filename = args[0]
-        except Exception:
-            raise Exception("General error occured while trying to assign filename")
+        self._filename = args[0]
 
     @property
     def crs(self):
@@ -119,10 +251,7 @@ class Vector(object):
         Positional arguments:
         1st = first positional argument is used to assign our class CRS value
         """
-        try:
-            self._crs = args[0]
-        except Exception:
-            raise Exception("General error occurred while trying to assign CRS")
+        self._crs = args[0]
 
     @property
     def schema(self):
@@ -138,11 +267,7 @@ class Vector(object):
         Positional arguments:
         1st = first positional argument is used to assign our class schema value
         """
-        try:
-            self._schema = args[0]
-        except Exception:
-            logger.warning("invalid schema argument provided -- falling back on "
-                           "default from our shapely geometries")
+        self._schema = args[0]
 
     @property
     def geometries(self):
@@ -151,22 +276,35 @@ class Vector(object):
 
     @geometries.setter
     def geometries(self, *args):
-        try:
-            self._geometries = args[0]
-        except Exception as e:
-            raise e
-        # default behavior is to accept shapely geometry as input, but a
-        # user may pass a string path to a shapefile and we will handle the input
-        # and write it to output -- this is essentially a file copy operation
-        try:
-            self.read(self._geometries)
-        # did you pass an incorrect filename?
-        except OSError:
-            raise OSError("Unable to read file passed passed by user")
-        # it can't be a string path -- assume is a Collection or Geometry object
-        # and pass it on
-        except Exception:
-            self._fiona_to_shapely_geometries(geometries=self._geometries)
+        """
+        Assign our geometries from shapely geometries, a list of
+        (fiona/GeoJSON) features, or a path to a vector dataset
+        """
+        _geometries = args[0]
+        # a user may pass a string path to a shapefile and we will handle
+        # the input -- this is essentially a file copy operation
+        if isinstance(_geometries, str):
+            try:
+                self.read(_geometries)
+            # did you pass an incorrect filename?
+            except OSError:
+                raise OSError("Unable to read file passed passed by user")
+            return
+        # peek at our first item, rather than materializing (what may be
+        # a streaming fiona Collection) just to decide what it holds
+        _geometries = iter(_geometries)
+        _first = next(_geometries, None)
+        if _first is None:
+            self._geometries = np.empty(0, dtype=object)
+            return
+        _geometries = itertools.chain((_first,), _geometries)
+        # shapely geometries can be stored as-is
+        if isinstance(_first, BaseGeometry):
+            self._geometries = _as_geometry_array(_geometries)
+        # otherwise, assume these are features and parse their
+        # geometries in one (vectorized) pass
+        else:
+            self._fiona_to_shapely_geometries(geometries=_geometries)
 
     @property
     def attributes(self):
@@ -175,8 +313,19 @@ class Vector(object):
 
     @attributes.setter
     def attributes(self, *args):
-        """ setter for our attributes """
-        self._attributes = args[0]
+        """
+        setter for our attributes -- accepts a DataFrame, or a fiona
+        Collection that we'll pull an attribute table from
+        """
+        _attributes = args[0]
+        if hasattr(_attributes, 'schema'):
+            # hand pandas plain value tuples (ordered like our schema)
+            # and our columns up-front
+            _attributes = _properties_to_dataframe(
+                (tuple(item['properties'].values()) for item in _attributes),
+                schema=_attributes.schema
+            )
+        self._attributes = _attributes
 
     def _fiona_to_shapely_geometries(self, geometries=None):
         """
@@ -185,7 +334,9 @@ class Vector(object):
         :param geometries:
         :return: None
         """
-        self._geometries = [shape(ft['geometry']) for ft in list(geometries)]
+        self._geometries = _to_shapely_geometries(
+            [ft['geometry'] for ft in geometries]
+        )
 
     def _json_string_to_shapely_geometries(self, string=None):
         """
@@ -196,7 +347,8 @@ class Vector(object):
         """
         # determine if string= is even json
         try:
-            _json = json.loads(string)
+            _json = orjson.loads(string) if _HAVE_ORJSON \
+                else json.loads(string)
         except Exception:
             raise Exception("unable to process string= "
                             "argument... is this not a json string?")
@@ -215,11 +367,12 @@ class Vector(object):
             logger.warning("no crs property defined for json input "
                            "-- assuming EPSG:4326")
             self.crs = {'crs': 'epsg:4326'}
-        # listcomp : iterate over our features and convert them
-        # to shape geometries
-        self._geometries = [shape(ft['geometry']) for ft in _features]
+        # convert our features to shapely geometries
+        self._geometries = _to_shapely_geometries(
+            [ft['geometry'] for ft in _features]
+        )
 
-    def read(self, filename=None, json=None):
+    def read(self, filename=None, json=None, engine=None):
         """
         Accepts a GeoJSON string or string path to a shapefile that is read
         and used to assign internal class variables for CRS, geometries, and schema
@@ -230,45 +383,135 @@ class Vector(object):
 
         Positional arguments:
         1st = either a full path to a file or a geojson string object
+        :param engine: 'pyogrio' or 'fiona' (default: pyogrio, if installed)
         :return: None
         """
         # args[0] / -filename / -string
         if is_valid_file(filename):
-            json = None
             self.filename = filename
         # if this is a json string, parse out our geometry and attribute
         # data accordingly
         elif is_json(json):
             self.filename = None
-            self._json_string_to_shapely_geometries(string=json)            
+            self._json_string_to_shapely_geometries(string=json)
+            return
         # by default, process this as a file and parse out or data using Fiona
-        _shape_collection = fiona.open(filename)
-        self._crs = _shape_collection.crs
-        self._crs_wkt = _shape_collection.crs_wkt
-        # parse our dict of geometries into an actual shapely list
-        self._fiona_to_shapely_geometries(geometries=_shape_collection)
-        self._schema = _shape_collection.schema
-        # process our attributes
-        self._attributes = pd.DataFrame(
-            [dict(item['properties']) for item in _shape_collection]
+        self._read_file(filename, engine=engine)
+
+    def _read_file(self, filename=None, engine=None):
+        """
+        Read a vector dataset from disc with fiona (and pyogrio, if
+        available) and assign our CRS, schema, geometries, and attributes
+        :param filename: full path to a vector dataset
+        :param engine: 'pyogrio' or 'fiona' (default: pyogrio, if installed)
+        :return: None
+        """
+        engine = _vector_engine(engine)
+        # the context manager releases our GDAL handle, even if we fail
+        # part-way through a read
+        with fiona.open(filename) as _shape_collection:
+            self._assign_collection(_shape_collection)
+            if engine == 'pyogrio':
+                self._assign_pyogrio(*_pyogrio_read(filename))
+            else:
+                self._assign_features(_shape_collection)
+
+    @classmethod
+    def iter_file(cls, filename=None, batch_size=_DEFAULT_BATCH_SIZE,
+                  engine=None):
+        """
+        Read a (very large) vector dataset batch_size= features at a time,
+        yielding a Vector for each batch, so that we never hold the whole
+        dataset in memory. Call to_geodataframe() on each batch if you
+        want GeoDataFrames.
+        :param filename: full path to a vector dataset
+        :param batch_size: number of features per batch
+        :param engine: 'pyogrio' or 'fiona' (default: pyogrio, if installed)
+        :return: generator of Vector objects
+        """
+        # args[0]/filename=
+        if filename is None:
+            raise IndexError("invalid filename= argument specified")
+        engine = _vector_engine(engine)
+        with fiona.open(filename) as _shape_collection:
+            if engine == 'pyogrio':
+                for _offset in range(0, len(_shape_collection), batch_size):
+                    _vector = cls()
+                    _vector._assign_collection(_shape_collection)
+                    _vector._assign_pyogrio(*_pyogrio_read(
+                        filename, skip_features=_offset,
+                        max_features=batch_size
+                    ))
+                    yield _vector
+                return
+            # fiona streams features, so we just slice off a batch at a time
+            _features = iter(_shape_collection)
+            while True:
+                _batch = list(itertools.islice(_features, batch_size))
+                if not _batch:
+                    return
+                _vector = cls()
+                _vector._assign_collection(_shape_collection)
+                _vector._assign_features(_batch)
+                yield _vector
+
+    def _assign_collection(self, collection=None):
+        """ assign our CRS and schema from an open fiona Collection """
+        self._crs = collection.crs
+        self._crs_wkt = collection.crs_wkt
+        self._schema = collection.schema
+
+    def _assign_pyogrio(self, meta=None, fids=None, wkb=None, fields=None):
+        """
+        Assign our geometries and attributes from a (columnar) pyogrio raw
+        read -- geometries come back as a WKB array and each attribute
+        field as a numpy array
+        """
+        self._geometries = from_wkb(wkb)
+        self._attributes = pd.DataFrame(dict(zip(meta['fields'], fields)))
+
+    def _assign_features(self, features=None):
+        """
+        Assign our geometries and attributes from an iterable of fiona
+        features. We stream our features once, keeping only their
+        geometries and property values (not whole feature records)
+        """
+        _geometries = []
+        _records = []
+        for _feature in features:
+            _geometries.append(_feature['geometry'])
+            _records.append(tuple(_feature['properties'].values()))
+        self._geometries = _to_shapely_geometries(_geometries)
+        self._attributes = _properties_to_dataframe(
+            _records, schema=self._schema
         )
 
-    def write(self, filename=None, type=None):
+    def write(self, filename=None, type=None, engine=None):
         """ wrapper for fiona.open that will write in-class geometry data to disk
 
         (Optional) Keyword arguments:
         filename -- the full path filename to a vector dataset (typically a .shp file)
+        engine -- 'pyogrio' or 'fiona' (default: pyogrio, if installed)
         (Optional) Positional arguments:
         1st -- if no keyword argument was used, attempt to .read the first pos argument
         """
+        engine = _vector_engine(engine)
         # args[0] / filename=
         if filename is not None:
             self.filename = filename
         # args[1] / type=
         if type is None:
             type = 'ESRI Shapefile'  # by default, write as a shapefile
+        if engine == 'pyogrio':
+            # columnar write through GDAL
+            return write_dataframe(self.to_geodataframe(), self.filename,
+                                   driver=type)
+        if type == 'ESRI Shapefile' and _HAVE_PYSHP and \
+                self._pyshp_fields() is not None:
+            return self._write_shapefile_pyshp()
         try:
-            # call fiona to write our geometry to disk
+            # call fiona to write our geometry to disk -- all of our
+            # features go over in a single writerecords() batch
             with fiona.open(
                 self.filename,
                 'w',
@@ -276,31 +519,169 @@ class Vector(object):
                 crs=self.crs,
                 schema=self.schema
             ) as shape:
-                # If there are multiple geometries, put the "for" loop here
-                shape.write({
-                    'geometry': mapping(self.geometries),
-                    'properties': {'id': 123},
-                })
+                shape.writerecords(
+                    {'geometry': g.__geo_interface__, 'properties': p}
+                    for g, p in zip(self._geometries,
+                                    self._attribute_records())
+                )
         except Exception:
             raise Exception("General error encountered trying "
                             "to call fiona.open on the input data. "
                             "Is the file not a shapefile?")
 
+    def _pyshp_fields(self):
+        """
+        Translate our (fiona) schema into pyshp field definitions, or
+        return None if it uses a type pyshp can't write (or has no
+        fields at all -- pyshp won't write a .dbf without one)
+        :return: list of (name, type, size, decimal) tuples or None
+        """
+        try:
+            _properties = self._schema['properties']
+        except (KeyError, TypeError):
+            return None
+        _fields = []
+        for _name, _type in _properties.items():
+            # e.g., 'int:10', 'float:24.15', 'str:80', or 'date'
+            _type, _, _width = _type.partition(':')
+            if _type not in _PYSHP_FIELD_TYPES:
+                return None
+            _size, _, _decimal = _width.partition('.')
+            _fields.append((
+                _name,
+                _PYSHP_FIELD_TYPES[_type],
+                int(_size) if _size else (8 if _type == 'date' else 50),
+                int(_decimal) if _decimal else (15 if _type == 'float' else 0)
+            ))
+        return _fields if _fields else None
+
+    def _write_shapefile_pyshp(self):
+        """
+        Write our geometries and attributes to an ESRI Shapefile with
+        pyshp, which packs records with much less overhead than fiona
+        :return: None
+        """
+        with shapefile.Writer(self.filename) as _writer:
+            for _field in self._pyshp_fields():
+                _writer.field(*_field)
+            _columns = list(self._schema['properties'].keys())
+            # fiona hands us dates as 'YYYY-MM-DD' strings, but pyshp
+            # wants datetime.date objects for 'D' fields
+            _dates = {
+                _name for _name, _type in self._schema['properties'].items()
+                if _type.partition(':')[0] == 'date'
+            }
+            for _geometry, _properties in zip(self._geometries,
+                                              self._attribute_records()):
+                for _name in _dates:
+                    _value = _properties.get(_name)
+                    if isinstance(_value, str):
+                        _properties[_name] = \
+                            datetime.date.fromisoformat(_value) \
+                            if _value else None
+                _writer.shape(_geometry.__geo_interface__)
+                _writer.record(*[_properties.get(c) for c in _columns])
+        # pyshp doesn't write a projection file for us
+        if self._crs_wkt:
+            with open(os.path.splitext(self.filename)[0] + '.prj', 'w') as _prj:
+                _prj.write(self._crs_wkt)
+
+    def _attribute_records(self):
+        """
+        Our attributes as a list of property dicts, one per geometry
+        (empty dicts, if we don't have an attribute table)
+        """
+        if isinstance(self._attributes, pd.DataFrame) and \
+                len(self._attributes.columns) > 0:
+            return self._attributes.to_dict(orient='records')
+        return [{} for _ in self._geometries]
+
+    def to_crs(self, epsg=None):
+        """
+        Reproject our geometries to a new EPSG code. Transformers are
+        cached, so repeat reprojections between the same pair of CRSs
+        don't rebuild a PROJ pipeline
+        :param epsg: integer EPSG code to reproject to
+        :return: Vector
+        """
+        # args[0]/epsg=
+        if epsg is None:
+            raise IndexError("invalid epsg= argument specified")
+        if isinstance(self._crs, dict) and 'init' in self._crs:
+            _src = self._crs['init'].upper()
+        elif self._crs_wkt:
+            _src = self._crs_wkt
+        else:
+            raise AttributeError("our CRS is undefined -- we can't "
+                                 "reproject from it")
+        _transformer = _cached_transformer(_src, "EPSG:" + str(int(epsg)))
+        _vector = copy(self)
+        if _HAVE_FROM_GEOJSON:
+            # shapely 2.x transforms every coordinate in one call
+            _vector._geometries = transform(
+                _as_geometry_array(self._geometries),
+                lambda xy: np.column_stack(
+                    _transformer.transform(xy[:, 0], xy[:, 1])
+                )
+            )
+        else:
+            _vector._geometries = _as_geometry_array([
+                shapely_transform(_transformer.transform, g)
+                for g in self._geometries
+            ])
+        _vector._crs = copy(_cached_from_epsg(int(epsg)))
+        _vector._crs_wkt = _cached_crs("EPSG:" + str(int(epsg))).to_wkt()
+        return _vector
+
+    def coords_soa(self):
+        """
+        Return all of our coordinates as a single packed (N, 2) float64
+        array, with Arrow-style offsets so that the coordinates of
+        geometry i are xy[offsets[i]:offsets[i + 1]]. Useful for running
+        vectorized operations over every vertex at once.
+        :return: (xy, offsets) tuple of numpy arrays
+        """
+        if not _HAVE_FROM_GEOJSON:
+            raise ImportError("coords_soa() requires shapely 2.x")
+        _xy, _index = get_coordinates(
+            _as_geometry_array(self._geometries), return_index=True
+        )
+        _offsets = np.zeros(len(self._geometries) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(_index, minlength=len(self._geometries)),
+                  out=_offsets[1:])
+        return _xy, _offsets
+
     def to_shapely_collection(self):
         """ return a shapely collection of our geometry data """
         return self.geometries
 
     def to_geodataframe(self):
-        """ return our spatial data as a geopandas dataframe """
+        """ return our spatial data as a geopandas dataframe. The frame is
+        built once and cached until our geometries, attributes, or crs
+        are re-assigned -- so treat it as read-only (copy it before
+        modifying it), and re-assign our attributes (rather than editing
+        them in-place) to have changes show up here """
+        if self._gdf_cache[1] == self._version:
+            return self._gdf_cache[0]
+        import geopandas as gp
         try:
-            _gdf = gp.GeoDataFrame({
-                "geometry": gp.GeoSeries(self._geometries),
-            })
-            _gdf.crs = self.crs
-            # merge in our attributes
-            _gdf = _gdf.join(self._attributes)
+            # geopandas can build its GeometryArray from our flat object
+            # array of geometries in one (vectorized) call
+            _geometries = _as_geometry_array(self._geometries)
+            if isinstance(self._attributes, pd.DataFrame):
+                _attributes = self._attributes.reset_index(drop=True)
+            else:
+                _attributes = pd.DataFrame(index=range(len(_geometries)))
+            # our attributes become the frame itself, rather than being
+            # join'd (and re-indexed) onto a geometry-only frame
+            _gdf = gp.GeoDataFrame(
+                _attributes,
+                geometry=gp.array.from_shapely(_geometries),
+                crs=self.crs if self.crs else None
+            )
+            self._gdf_cache = (_gdf, self._version)
         except Exception:
-            logger.warning("failed to build a GeoDataFrame from shapely"
+            logger.warning("failed to build a GeoDataFrame from shapely "
                            "geometries -- will try to read from original"
                            " source file instead")
             _gdf = gp.read_file(self._filename)
@@ -314,81 +695,267 @@ class Vector(object):
         return self.to_geodataframe()
 
     def to_ee_feature_collection(self):
-        return ee.FeatureCollection(self.to_geojson(stringify=True))
+        return _import_ee().FeatureCollection(
+            self.to_geojson(stringify=True)
+        )
 
     def to_geojson(self, stringify=None):
         """
-
-        :param args:
-        :return:
+        Build a GeoJSON FeatureCollection from our shapely geometries and
+        attributes
+        :param stringify: return a JSON string, rather than a dict
+        :return: dict or string
         """
+        _properties = self._attribute_records()
+        # copy crs mappings; other CRSs (e.g., WKT strings for CRSs
+        # without an EPSG code) pass through as-is
+        _crs = (dict(self._crs) if isinstance(self._crs, dict)
+                else self._crs) if self._crs else None
         # args[0]/stringify=
-        if stringify is not None:
-            stringify = True
-        # build a target dictionary
+        if stringify and _HAVE_FROM_GEOJSON:
+            # serialize every geometry in one vectorized call and splice
+            # the strings into our output, rather than building dicts
+            _features = ", ".join(
+                '{"type": "Feature", "geometry": %s, "properties": %s}' %
+                (g if g is not None else 'null', _json_dumps(p))
+                for g, p in zip(
+                    to_geojson(_as_geometry_array(self._geometries)),
+                    _properties
+                )
+            )
+            return '{"type": "FeatureCollection", "features": [%s], ' \
+                   '"crs": %s}' % (_features, _json_dumps(_crs))
+        # build a target dictionary -- with shapely 2.x, GEOS writes our
+        # geometries as json (in C) and we parse each one, which beats
+        # walking every coordinate in python with __geo_interface__
+        if _HAVE_FROM_GEOJSON:
+            _loads = orjson.loads if _HAVE_ORJSON else json.loads
+            _geometries = [
+                _loads(g) if g is not None else None
+                for g in to_geojson(_as_geometry_array(self._geometries))
+            ]
+        else:
+            _geometries = [g.__geo_interface__ for g in self._geometries]
         feature_collection = {
             "type": "FeatureCollection",
-            "features": [],
-            "crs": [],
-            "properties": []
+            "features": [
+                {
+                    "type": "Feature",
+                    "geometry": g,
+                    "properties": p
+                }
+                for g, p in zip(_geometries, _properties)
+            ],
+            "crs": _crs
         }
-        # iterate over features in our shapely geometries
-        # and build-out our feature_collection
-        for feature in self._geometries:
-            if isinstance(feature, dict):
-                feature_collection["features"].append(feature)
-            else:
-                # assume that json will know what to do with it
-                # and raise an error if it doesn't
-                try:
-                    feature_collection["features"].append(json.loads(feature))
-                except Exception as e:
-                    raise e
-        # note the CRS
-        if self._crs:
-            feature_collection["crs"].append(self._crs)
-        # define our properties (attributes)
-        for i in self.attributes.index:
-            feature_collection['properties'].append(
-                self.attributes.loc[i].to_json()
-            )
-        # do we want this stringified?
         if stringify:
-            feature_collection = json.dumps(feature_collection)
-
+            return _json_dumps(feature_collection)
         return feature_collection
 
 
-def _geom_units(*args):
-    # args[0]
-    try:
-        _gdf = args[0]
-    except IndexError:
+def _vector_engine(engine=None):
+    """
+    Validate an engine= argument for Vector IO, defaulting to pyogrio
+    if it's installed and fiona otherwise
+    """
+    if engine is None:
+        engine = 'pyogrio' if _HAVE_PYOGRIO else 'fiona'
+    if engine not in ('pyogrio', 'fiona'):
+        raise ValueError("engine= should be either 'pyogrio' or 'fiona'")
+    if engine == 'pyogrio' and not _HAVE_PYOGRIO:
+        raise ImportError("engine='pyogrio' requested, but we failed to "
+                          "import pyogrio")
+    return engine
+
+
+def _json_dumps(obj=None):
+    """ json.dumps (via orjson, if available) that handles numpy scalars """
+    if _HAVE_ORJSON:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SERIALIZE_NUMPY
+        ).decode('utf-8')
+    return json.dumps(obj, default=_json_default)
+
+
+def _json_default(obj=None):
+    """ let json.dumps serialize numpy scalars (e.g., from our attributes) """
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("object of type %s is not JSON serializable" %
+                    type(obj).__name__)
+
+
+def _to_shapely_geometries(geometries=None):
+    """
+    Convert a list of GeoJSON-like geometry mappings to a numpy (object)
+    array of shapely geometries. With shapely 2.x we parse every geometry
+    with one vectorized from_geojson() call; otherwise we fall back on
+    shape()
+    :param geometries: list of GeoJSON geometry dicts (or objects with
+    a __geo_interface__)
+    :return: numpy array of shapely geometries
+    """
+    if geometries is None:
+        raise IndexError("invalid geometries= argument specified")
+    if _HAVE_FROM_GEOJSON:
+        geometries = list(geometries)
+        _result = np.empty(len(geometries), dtype=object)
+        # hole-free polygons (most of what we see) can be built straight
+        # from their coordinates, skipping json entirely
+        _simple = [
+            i for i, g in enumerate(geometries)
+            if g['type'] == 'Polygon' and len(g['coordinates']) == 1
+        ]
+        _remainder = np.ones(len(geometries), dtype=bool)
+        if _simple:
+            try:
+                _result[_simple] = _simple_polygons(
+                    [geometries[i]['coordinates'][0] for i in _simple]
+                )
+                _remainder[_simple] = False
+            except ValueError:
+                # e.g., mixed 2D/3D coordinates -- let GEOS sort it out
+                pass
+        _remainder = np.flatnonzero(_remainder)
+        if len(_remainder) == 0:
+            return _result
+        try:
+            _dumps = orjson.dumps if _HAVE_ORJSON else json.dumps
+            _result[_remainder] = from_geojson(np.array(
+                [_dumps(geometries[i]) for i in _remainder], dtype=object
+            ))
+            return _result
+        except (TypeError, ValueError):
+            # e.g., fiona Geometry objects that json can't serialize
+            pass
+    return _as_geometry_array([shape(g) for g in geometries])
+
+
+def _properties_to_dataframe(records=None, schema=None):
+    """
+    Build an attribute table column-wise from an iterable of feature
+    property value tuples (ordered like our schema), so pandas infers
+    one dtype per column rather than walking N row dicts
+    :param records: iterable of property value tuples
+    :param schema: fiona schema dict describing our properties
+    :return: pandas DataFrame
+    """
+    _columns = list(schema['properties'].keys())
+    _values = list(zip(*records)) or [()] * len(_columns)
+    _table = {}
+    for _name, _column in zip(_columns, _values):
+        _dtype = _PANDAS_FIELD_TYPES.get(
+            schema['properties'][_name].split(':')[0])
+        try:
+            # fixed-width numeric fields can skip object-dtype inference,
+            # unless they carry nulls
+            _table[_name] = np.array(_column, dtype=_dtype) \
+                if _dtype is not None else list(_column)
+        except (TypeError, ValueError):
+            _table[_name] = list(_column)
+    return pd.DataFrame(_table, columns=_columns, copy=False)
+
+
+def _simple_polygons(rings=None):
+    """
+    Build hole-free polygons from a list of exterior rings (coordinate
+    lists) with shapely 2.x's vectorized constructors
+    :param rings: list of exterior ring coordinate lists
+    :return: numpy array of shapely Polygons
+    """
+    _coords = [np.asarray(r, dtype=np.float64) for r in rings]
+    _indices = np.repeat(np.arange(len(_coords)), [len(c) for c in _coords])
+    return polygons(linearrings(np.concatenate(_coords), indices=_indices))
+
+
+def _as_geometry_array(geometries=None):
+    """
+    Store a sequence of shapely geometries as a flat numpy object array.
+    We fill a preallocated array element-wise, because numpy would try
+    to iterate over (pre-2.0) shapely geometries that look like sequences
+    """
+    if isinstance(geometries, np.ndarray) and geometries.dtype == object:
+        return geometries
+    _geometries = list(geometries)
+    _array = np.empty(len(_geometries), dtype=object)
+    for i, geometry in enumerate(_geometries):
+        _array[i] = geometry
+    return _array
+
+
+def _geom_units(gdf=None):
+    """
+    Determine the (linear) units of a Vector or GeoDataFrame's CRS
+    :param gdf: Vector or GeoDataFrame object
+    :return: string (e.g., 'm')
+    """
+    # args[0]/gdf=
+    if gdf is None:
         raise IndexError("1st positional argument should either "
                          "be a Vector or GeoDataFrame object")
-    if isinstance(_gdf, Vector):
-        _gdf = _gdf.to_geodataframe()
+    # we only need a CRS, so there's no need to build a GeoDataFrame
+    # from a Vector here
+    _gdf = gdf
     # by default, there should be a units key
     # associated with the CRS dict object. Prefer
     # to use that units entry
     try:
-        return _gdf['crs']['units']
-    # otherwise, let's hackishly lean on pyproj to figure out
-    # units from the full PROJ.4 string
-    except KeyError:
-        proj_4_string = pyproj.Proj(
-            "+init=EPSG:"+str(_gdf.crs['init'].split(":")[1])
-        )
-        _units = proj_4_string.srs.split("+units=")[1].split(" +")[0]
-        if _units.find("m") != -1:
+        return _gdf.crs['units']
+    # otherwise, lean on pyproj to figure out units from
+    # the CRS's first axis
+    except (KeyError, TypeError):
+        _crs = _gdf.crs
+        if isinstance(_crs, dict) and 'init' in _crs:
+            _crs = _crs['init'].upper()  # e.g., 'EPSG:2163'
+        # (dicts can't be hashed for our cache)
+        _units = (_cached_crs.__wrapped__ if isinstance(_crs, dict)
+                  else _cached_crs)(_crs).axis_info[0].unit_name
+        if _units in ("metre", "meter"):
             return "m"
         else:
             return _units
 
 
-def _local_rebuild_crs(*args):
-    _gdf = args[0]
-    _gdf.crs = fiona.crs.from_epsg(int(_gdf.crs['init'].split(":")[1]))
+@functools.lru_cache(maxsize=256)
+def _cached_crs(crs=None):
+    """ pyproj.CRS objects are expensive to build, so keep them around """
+    import pyproj
+    return pyproj.CRS.from_user_input(crs)
+
+
+@functools.lru_cache(maxsize=128)
+def _cached_transformer(src_crs=None, dst_crs=None):
+    """ cached (x, y ordered) pyproj.Transformer between two CRSs """
+    import pyproj
+    return pyproj.Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_from_epsg(epsg=None):
+    """ cached equivalent of fiona.crs.from_epsg """
+    return fiona.crs.from_epsg(epsg)
+
+
+def _local_rebuild_crs(gdf=None):
+    """
+    Rebuild an {'init': 'epsg:n'} CRS as a full (fiona) CRS dict
+    :param gdf: GeoDataFrame (or Vector) object
+    :return: gdf
+    """
+    # args[0]/gdf=
+    if gdf is None:
+        raise IndexError("invalid gdf= argument specified")
+    _gdf = gdf
+    # we can only rebuild from an {'init': 'epsg:n'} style CRS -- anything
+    # else is already as explicit as we can make it
+    if not isinstance(_gdf.crs, dict) or 'init' not in _gdf.crs:
+        return _gdf
+    _crs = _cached_from_epsg(int(_gdf.crs['init'].split(":")[1]))
+    # nothing to do if we already have this exact CRS
+    if _gdf.crs == _crs:
+        return _gdf
+    # copy our cached CRS, so that nobody can modify it in-place
+    _gdf.crs = copy(_crs)
     return _gdf
 
 
@@ -396,44 +963,85 @@ def _ee_rebuild_crs(*args):
     pass
 
 
+# backend class -> rebuild_crs implementation
+_REBUILD_CRS = {
+    EE: _ee_rebuild_crs,
+    Local: _local_rebuild_crs
+}
+
+
 def rebuild_crs(*args):
     """
-    Build a CRS dict for a user-specified Vector or GeoDataFrame object
+    Build a CRS dict for a user-specified Vector or GeoDataFrame object.
+    If the first positional argument is a backend (EE or Local), the rest
+    are passed on to that backend's implementation
     :param args:
     :return:
     """
-    if isinstance(args[0], "EE"):
-        return Do(
-            args[2:],
-            this=_ee_rebuild_crs,
-            that=args[1],
-        ).run()
-    elif isinstance(args[0], "Local"):
-        return Do(
-            args[2:],
-            this=_local_rebuild_crs,
-            that=args[1]
-        ).run()
-    else:
-        # our default action is to just assume local operation
-        return _local_rebuild_crs(*args)
+    _rebuild = _REBUILD_CRS.get(type(args[0]))
+    if _rebuild is not None:
+        return _rebuild(*args[1:])
+    # our default action is to just assume local operation
+    return _local_rebuild_crs(*args)
+
+
+def reproject(vector=None, epsg=None):
+    """
+    Reproject a Vector (or GeoDataFrame) to a new EPSG code. Vector
+    coordinates are transformed as one packed array with a cached
+    pyproj.Transformer (see Vector.to_crs)
+    :param vector: Vector or GeoDataFrame object
+    :param epsg: integer EPSG code to reproject to
+    :return: Vector or GeoDataFrame
+    """
+    # args[0]/vector=
+    if vector is None:
+        raise IndexError("invalid vector= argument specified")
+    # args[1]/epsg=
+    if epsg is None:
+        raise IndexError("invalid epsg= argument specified")
+    if isinstance(vector, Vector):
+        return vector.to_crs(epsg)
+    return vector.to_crs(epsg=int(epsg))
+
 
 def is_valid_file(string=None):
+    """
+    Determine whether string= is a path to an existing file. Paths we've
+    already found are cached by absolute path (see _cached_path_exists),
+    so repeat checks (e.g., from __init__ and then read) don't stat the
+    (possibly networked) file again. Missing paths are always re-checked,
+    so a file written after we first looked for it is found.
+    """
+    if not isinstance(string, (str, os.PathLike)):
+        return False
     try:
-        if os.path.exists(string):
-            return True
-        else:
-            return False
-    except Exception:
+        return _cached_path_exists(os.path.abspath(os.fspath(string)))
+    except FileNotFoundError:
         return False
 
+
+@functools.lru_cache(maxsize=1024)
+def _cached_path_exists(path=None):
+    """ bounded cache of absolute paths that exist. lru_cache doesn't
+    cache exceptions, so we raise for missing paths rather than caching
+    a negative answer """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return True
+
+
 def is_json(string=None):
-    if string is None:
-        return False
-    # sneakily use json.loads() to test whether this is
-    # a valid json string
-    try:
-        string = json.loads(string)
-        return True
-    except Exception:
-        return False
+    """
+    Cheaply guess whether string= is a json string. We only look at the
+    first non-whitespace character, rather than parsing (what may be a
+    very large) string twice -- _json_string_to_shapely_geometries will
+    raise if it isn't actually valid json.
+    """
+    if isinstance(string, str):
+        # match() scans in place -- lstrip() would copy a (potentially
+        # huge) string that starts with whitespace
+        return _JSON_PREFIX.match(string) is not None
+    if isinstance(string, bytes):
+        return _JSON_PREFIX_BYTES.match(string) is not None
+    return False
@@ -11,13 +11,100 @@ __status__ = "Testing"
 """
 
 import sys, os, re
+import importlib
 import numpy as np
 import argparse as ap
 import logging
+import psutil
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# standard numpy functions that we may have
+# non-generic ndimage filters available for
+# specifying these in advance can really
+# speed-up our calculations
+_NUMPY_STR_TO_FUNCTIONS = {
+    'sum' : np.sum,
+    'mean': np.mean,
+    'median' : np.median,
+    'sd' : np.std,
+    'stdev' : np.std,
+    'std' : np.std,
+    'max' : np.max,
+    'min' : np.min
+}
+# users might pass a key with extra designators (like np.mean,
+# numpy.median) -- spell those out once, up-front, so we can do a
+# plain lookup rather than (order-dependent) substring matching
+_FUNCTION_ALIASES = {
+    prefix + name: function
+    for name, function in _NUMPY_STR_TO_FUNCTIONS.items()
+    for prefix in ('', 'np.', 'numpy.')
+}
+
+def get_numpy_function(user_fun_str=None):
+    """
+    Look-up our user-specified function string (e.g., 'sum', 'np.sum',
+    or 'numpy.sum') in our table of numpy functions
+    :return: numpy function, or None if we don't have a match
+    """
+    return _FUNCTION_ALIASES.get(str(user_fun_str).lower().strip())
+
+def resolve_function(user_fun_str=None):
+    """
+    argparse type= handler for -f/--fun that resolves our function once,
+    at parse time. Known numpy reductions are matched from our table
+    (and get fast, pre-canned filters). Anything else has to be an
+    explicit module.function path (e.g., 'scipy.stats.mode') that we can
+    import -- and will run through the (slow) generic filter.
+    :return: function
+    """
+    _function = get_numpy_function(user_fun_str)
+    if _function is not None:
+        return _function
+    _module, _, _name = str(user_fun_str).rpartition('.')
+    try:
+        return getattr(importlib.import_module(_module), _name)
+    except (ImportError, AttributeError, ValueError):
+        raise ap.ArgumentTypeError(
+            "unknown function %r -- use one of %s or an importable "
+            "module.function path" %
+            (user_fun_str, ", ".join(_NUMPY_STR_TO_FUNCTIONS))
+        )
+
+_RECLASS_PATTERN = re.compile(r'^\s*(\w+)\s*=\s*(-?\d+(?:\s*,\s*-?\d+)*)\s*$')
+
+def parse_int_list(string=None):
+    """
+    argparse type= handler for comma-separated integers (e.g., '3,11,33')
+    :return: list of int
+    """
+    try:
+        return [int(i) for i in str(string).split(',')]
+    except ValueError:
+        raise ap.ArgumentTypeError(
+            "expected comma-separated integers, got %r" % string)
+
+def parse_reclass(string=None):
+    """
+    argparse type= handler for our reclass string (e.g., 'row_crop=1,2,3;
+    wheat=2,7'), parsed once at parse time
+    :return: dict of class name -> numpy array of match values
+    """
+    _match_arrays = {}
+    for _class in filter(str.strip, str(string).split(';')):
+        _parsed = _RECLASS_PATTERN.match(_class)
+        if not _parsed:
+            raise ap.ArgumentTypeError(
+                "couldn't parse reclass class %r -- expected name=1,2,3" %
+                _class)
+        _match_arrays[_parsed.group(1)] = np.array(
+            parse_int_list(_parsed.group(2)), dtype=np.int64)
+    return _match_arrays
+
 # define handlers for argparse for any arguments passed at runtime
 example_text = str(
     "example: " + sys.argv[0] +
@@ -45,15 +132,15 @@ parser.add_argument(
     '-c',
     '--reclass',
     help='If we are going to reclassify the input raster here are the cell values to match',
-    type=str,
+    type=parse_reclass,
     required=False
 )
 
 parser.add_argument(
     '-f',
     '--fun',
-    help='Specifies the function to apply over a moving window. The default function is sum. Sum, mean, and sd are supported.',
-    type=str,
+    help='Specifies the function to apply over a moving window. sum, mean, sd, median, max, and min are supported natively; anything else should be an importable module.function path.',
+    type=resolve_function,
     required=True
 )
 
@@ -61,7 +148,7 @@ parser.add_argument(
     '-w',
     '--window-sizes',
     help='Specifies the dimensions for our window(s)',
-    type=str,
+    type=parse_int_list,
     required=True
 )
 
@@ -69,7 +156,7 @@ parser.add_argument(
     '-t',
     '--target-value',
     help='Specifies the target value we are reclassifying to, if the user asked us to reclassify. Default is binary reclassification',
-    type=str,
+    type=parse_int_list,
     required=False
 )
 
@@ -82,6 +169,25 @@ parser.add_argument(
     required=False
 )
 
+parser.add_argument(
+    '-n',
+    '--n-workers',
+    help='Number of processes to spread our reclass classes and window '+
+    'sizes across. Default is 1 (run everything in this process); -1 uses '+
+    'every CPU',
+    type=int,
+    required=False
+)
+
+parser.add_argument(
+    '-k',
+    '--cache',
+    help='Keep our reclassified raster in an on-disc cache, keyed on the '+
+    'source raster and reclass values, so repeat runs can skip the reclass',
+    action='store_true',
+    required=False
+)
+
 parser.add_argument(
     '-d',
     '--debug',
@@ -92,39 +198,46 @@ parser.add_argument(
 
 args = vars(parser.parse_args())
 
+# fail fast on anything we can check before we touch (potentially very
+# large) rasters -- remote rasters (e.g., http://, s3://, /vsi*) are
+# checked when GDAL opens them
+if not re.match(r'^(/vsi|[a-z0-9]+://)', args['raster'], re.IGNORECASE) \
+        and not os.path.isfile(args['raster']):
+    parser.error("-r/--raster %r doesn't exist" % args['raster'])
+if not args['window_sizes'] or min(args['window_sizes']) < 1:
+    parser.error("-w/--window-sizes should be one or more positive "
+                 "integers")
+if args['n_workers'] == 0 or (args['n_workers'] or 1) < -1:
+    parser.error("-n/--n-workers should be a positive integer (or -1)")
+
 # -d/--debug
 if not args['debug']:
     # disable logging unless asked by the user
     logger.disabled = True
 
-from beatbox import Raster
-from beatbox.moving_windows import filter
+from beatbox.moving_windows import filter_file
 
-# standard numpy functions that we may have
-# non-generic ndimage filters available for
-# specifying these in advance can really
-# speed-up our calculations
-_NUMPY_STR_TO_FUNCTIONS = {
-    'sum' : np.sum,
-    'mean': np.mean,
-    'median' : np.median,
-    'sd' : np.std,
-    'stdev' : np.std
-}
-
-def get_numpy_function(user_fun_str=None):
+def limit_threads(n_workers=None):
     """
-    Parse our NUMPY_STR dictionary using regular expressions
-    for our user-specified function string.
-    :return:
+    ProcessPoolExecutor initializer that splits our CPUs between workers,
+    so n workers don't each run a full complement of numba threads -- and
+    gives each its share of a GDAL block cache of 25% of our RAM (unless
+    the user has already sized GDAL_CACHEMAX)
     """
-    for np_function_str in list(_NUMPY_STR_TO_FUNCTIONS.keys()):
-        # user might pass a key with extra designators
-        # (like np.mean, numpy.median) -- let's
-        if bool(re.search(string=str(user_fun_str), pattern=np_function_str)):
-            return _NUMPY_STR_TO_FUNCTIONS[np_function_str]
-    # default case
-    return None
+    from osgeo import gdal
+    if gdal.GetConfigOption('GDAL_CACHEMAX') is None:
+        _cache_mb = max(1, psutil.virtual_memory().total // 4 // n_workers //
+                        2 ** 20)
+        # GDAL reads values of 100000 and up as bytes, rather than MB
+        gdal.SetConfigOption(
+            'GDAL_CACHEMAX',
+            str(_cache_mb if _cache_mb < 100000 else _cache_mb * 2 ** 20))
+    try:
+        import numba
+        numba.set_num_threads(max(1, numba.config.NUMBA_NUM_THREADS //
+                                  n_workers))
+    except ImportError:
+        pass
 
 def cat(string=None):
     ''' print minus the implied \n'''
@@ -139,74 +252,77 @@ if __name__ == "__main__":
     _MATCH_ARRAYS = {}  # used for reclass operations
     _TARGET_RECLASS_VALUE = [1] # if we reclass a raster, what should we reclass to?
     _OUTFILE_NAME = "output" # output filename prefix
-    if len(sys.argv) == 1 :
-        parser.print_help()
-        sys.exit(0)
     # -r/--raster
     _INPUT_RASTER = args['raster']
     # -t/--target-values
     if args['target_value']:
-        _TARGET_RECLASS_VALUE = list(map(int, args['target_value'].split(',')))
+        _TARGET_RECLASS_VALUE = args['target_value']
     # -f/--fun
-    _FUNCTION = get_numpy_function(args['fun'])
-    # if this doesn't map as a numpy function, maybe it's something else
-    # lurking in the global scope we can find?
-    if not _FUNCTION:
-        try:
-            if re.search(string=args['fun'],pattern="\."):
-                function = args['fun'].split(".")
-                # assume user wants an explicit function : e.g., "numpy.min"
-                _FUNCTION=getattr(globals()[function[0]],function[1])
-            else:
-                _FUNCTION=globals()[args['fun']]()
-        except KeyError as e:
-            raise KeyError("user specified function can't be mapped to numpy ",
-                           "or anything else : %s", e)
+    _FUNCTION = args['fun']
     # -w/--window-size
     if args['window_sizes']:
-        _WINDOW_DIMS = list(map(int, args['window_sizes'].split(',')))
+        _WINDOW_DIMS = args['window_sizes']
     # -c/--reclass
     if args['reclass']:
-        _classes = args['reclass'].split(";")
-        for c in classes:
-            c = c.split("=")
-            _MATCH_ARRAYS[c[0]] = list(map(int, c[1].split(",")))
+        _MATCH_ARRAYS = args['reclass']
     # -o/--outfile
     if args['outfile']:
         _OUTFILE_NAME = args['outfile']
-    # sanity-check runtime input
-    if not _WINDOW_DIMS:
-        raise ValueError("moving window dimensions need to be specified using"
-        "the -w argument at runtime. see -h for usage.")
-    elif not _INPUT_RASTER:
-        raise ValueError("An input raster should be specified"
-        "with the -r argument at runtime. see -h for usage.")
-    #
-    r = Raster(_INPUT_RASTER)
-    # perform any re-classification requests prior to our ndimage filtering
-    if _MATCH_ARRAYS:
-        cat(" -- performing moving window analyses: ")
-        for m in _MATCH_ARRAYS:
-            focal = r
-            if _MATCH_ARRAYS[m] is not None:
-                focal.array= binary_reclassify(
-                    raster=focal,
-                    match=_MATCH_ARRAYS[m])
-            for window in _WINDOW_DIMS:
-                filename=str(_OUTFILE_NAME+"_"+str(window)+"x"+str(window))
-                filter(
-                    r = focal,
-                    function = _FUNCTION,
-                    size = window,
-                    dest_file = filename)
-                '['+str(round(([i+1 for i,x in enumerate(_WINDOW_DIMS) if x == window][0] / len(_WINDOW_DIMS))*100))+'%]'
-    # otherwise just do our ndimage filtering
+    # -n/--n-workers
+    _N_WORKERS = args['n_workers'] if args['n_workers'] else 1
+    if _N_WORKERS < 0:
+        _N_WORKERS = os.cpu_count()
+    # filter_file reclassifies (and filters) every class it's given from
+    # one read of our source raster, so stack our classes into as few
+    # jobs as we have workers. Keep each class's output separate if we
+    # have more than one
+    if len(_MATCH_ARRAYS) > 1:
+        _JOBS = [
+            (_OUTFILE_NAME, {str(m): _MATCH_ARRAYS[m] for m in names})
+            for names in np.array_split(
+                list(_MATCH_ARRAYS), min(len(_MATCH_ARRAYS), _N_WORKERS))
+        ]
     else:
-        for window in _WINDOW_DIMS:
-            filename = str(_OUTFILE_NAME+"_"+str(window)+"x"+str(window))
-            test = filter(
-                r = r,
+        _JOBS = [(_OUTFILE_NAME, next(iter(_MATCH_ARRAYS.values()), None))]
+    # if we have more workers than jobs, split our window sizes, too
+    # (sizes that share a job also share their prefix sums)
+    _SPLITS = max(1, min(len(_WINDOW_DIMS), _N_WORKERS // len(_JOBS)))
+    _JOBS = [
+        (prefix, match, sizes.tolist())
+        for prefix, match in _JOBS
+        for sizes in np.array_split(_WINDOW_DIMS, _SPLITS)
+    ]
+    # stream our raster through our windows a strip at a time, rather
+    # than loading it into memory in full
+    cat(" -- performing moving window analyses: ")
+    if _N_WORKERS == 1:
+        # no sense spawning (and pickling our arguments to) a worker
+        limit_threads(1)
+        for i, (prefix, match, sizes) in enumerate(_JOBS):
+            filter_file(
+                src_filename = _INPUT_RASTER,
+                dest_filename = prefix,
                 function = _FUNCTION,
-                size = window,
-                dest_filename = filename)
-            '['+str(round(([i+1 for i,x in enumerate(_WINDOW_DIMS) if x == window][0] / len(_WINDOW_DIMS))*100))+'%]'
+                sizes = sizes,
+                match = match,
+                disc_caching = args['cache'])
+            cat('[' + str(round((i + 1) / len(_JOBS) * 100)) + '%]')
+    else:
+        with ProcessPoolExecutor(max_workers=_N_WORKERS,
+                                 initializer=limit_threads,
+                                 initargs=(_N_WORKERS,)) as pool:
+            _FUTURES = [
+                pool.submit(
+                    filter_file,
+                    src_filename = _INPUT_RASTER,
+                    dest_filename = prefix,
+                    function = _FUNCTION,
+                    sizes = sizes,
+                    match = match,
+                    disc_caching = args['cache'])
+                for prefix, match, sizes in _JOBS
+            ]
+            for i, future in enumerate(as_completed(_FUTURES)):
+                future.result()
+                cat('[' + str(round((i + 1) / len(_FUTURES) * 100)) + '%]')
+    cat("\n")
@@ -1,4 +1,5 @@
 import unittest
+import functools
 
 from copy import copy, deepcopy
 
@@ -70,5 +71,358 @@ class TestVectorBaseMethods(unittest.TestCase):
     def test_to_ee_feature_collection(self):
         pass
 
+class TestRasterHelpers(unittest.TestCase):
+    def test_is_number(self):
+        from beatbox.raster import _is_number
+        self.assertTrue(_is_number([1, 2, 3.5]))
+        self.assertTrue(_is_number(7))
+        self.assertFalse(_is_number([1, 'a']))
+        self.assertFalse(_is_number([True, False]))
+        self.assertFalse(_is_number(None))
+
+def _write_test_geotiff(filename=None, array=None, block_shape=(16, 16)):
+    """ write array= as a small, tiled single band GeoTIFF """
+    from osgeo import gdal, gdal_array
+    _dataset = gdal.GetDriverByName('GTiff').Create(
+        filename, array.shape[1], array.shape[0], 1,
+        gdal_array.NumericTypeCodeToGDALTypeCode(array.dtype),
+        options=['TILED=YES', 'BLOCKYSIZE=%d' % block_shape[0],
+                 'BLOCKXSIZE=%d' % block_shape[1]]
+    )
+    _dataset.SetGeoTransform((0, 30, 0, 0, 0, -30))
+    _dataset.GetRasterBand(1).WriteArray(array)
+    _dataset.FlushCache()
+    del _dataset
+    return filename
+
+@functools.lru_cache(maxsize=1)
+def _moving_windows():
+    """ load beatbox/moving_windows.py by path -- importing it through
+    the beatbox package pulls in raster.py (and GDAL), which the pure
+    numpy window tests don't need. It's registered under its own name,
+    which numba's on-disk cache records for our kernels. """
+    import os
+    import sys
+    import importlib.util
+    if 'beatbox.moving_windows' in sys.modules:
+        return sys.modules['beatbox.moving_windows']
+    _spec = importlib.util.spec_from_file_location(
+        'beatbox.moving_windows',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     os.pardir, 'beatbox', 'moving_windows.py'))
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules['beatbox.moving_windows'] = _module
+    _spec.loader.exec_module(_module)
+    return _module
+
+class TestRasterReclassify(unittest.TestCase):
+    def test_binary_reclassify_matches_isin(self):
+        import numpy as np
+        from beatbox.raster import _local_binary_reclassify, \
+            _RECLASS_MAX_COMPARES
+        _rng = np.random.default_rng(0)
+        # short match lists take our comparison path, long ones our LUT,
+        # and 32-bit (and float) rasters fall back on np.isin
+        _matches = ([1], [1, 3, -5, 150, 1000, 2.5],
+                    list(range(-60, 60, 3)), [])
+        self.assertGreater(len(_matches[2]), _RECLASS_MAX_COMPARES)
+        for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.int32,
+                      np.float32):
+            _array = _rng.integers(-100, 200, (40, 50)).astype(dtype)
+            for match in _matches:
+                for invert in (False, True):
+                    _expected = np.isin(_array, match, invert=invert)
+                    np.testing.assert_array_equal(
+                        _local_binary_reclassify(_array, match, invert),
+                        _expected)
+                    _out = np.empty(_array.shape, dtype=np.uint8)
+                    self.assertIs(_local_binary_reclassify(
+                        _array, match, invert, out=_out), _out)
+                    np.testing.assert_array_equal(_out, _expected)
+                    _out = np.empty(_array.shape, dtype=np.float32)
+                    _local_binary_reclassify(_array, match, invert, out=_out)
+                    np.testing.assert_array_equal(_out, _expected)
+
+    def test_reclass_lut(self):
+        import numpy as np
+        from beatbox.raster import _reclass_lut, _reclass_values
+        _values = _reclass_values(np.dtype(np.int8).str, (-3, 7, 300, 1.5))
+        self.assertEqual(_values, (-3, 7))
+        _lut = _reclass_lut(np.dtype(np.int8).str, _values)
+        self.assertEqual(len(_lut), 256)
+        self.assertFalse(_lut.flags.writeable)
+        _all = np.arange(-128, 128, dtype=np.int8)
+        np.testing.assert_array_equal(_lut[_all.view(np.uint8)],
+                                      np.isin(_all, (-3, 7)))
+
+class TestRasterTerrain(unittest.TestCase):
+    def test_slope_aspect_engines_agree(self):
+        import numpy as np
+        from beatbox.raster import Raster, slope, aspect, _HAVE_NUMBA, \
+            _HAVE_NUMEXPR
+        _rng = np.random.default_rng(0)
+        _elevation = _rng.random((40, 30)).astype(np.float32) * 100
+        _elevation[5, 7] = -9999
+        _raster = Raster(array=_elevation)
+        _raster.ndv = -9999
+        _engines = ['scipy'] + (['numba'] if _HAVE_NUMBA else []) + \
+            (['numexpr'] if _HAVE_NUMEXPR else [])
+        for function in (slope, aspect):
+            _expected = function(_raster, engine='scipy').data
+            for engine in _engines:
+                np.testing.assert_allclose(
+                    function(_raster, engine=engine).data, _expected,
+                    rtol=1e-4, atol=1e-4)
+
+class TestRasterSpecialize(unittest.TestCase):
+    def test_specialized_raster_fields(self):
+        import numpy as np
+        from beatbox.raster import Raster
+        _class = Raster.specialize((4, 5), np.float32, np.nan)
+        # NaN no data values share one specialized class
+        self.assertIs(Raster.specialize((4, 5), 'float32', float('nan')),
+                      _class)
+        _raster = _class(array=np.zeros((4, 5), dtype=np.float32))
+        self.assertIsInstance(_raster, Raster)
+        self.assertIsNone(_raster.band_descriptions)
+        self.assertTrue(np.isnan(_raster.ndv))
+        self.assertIs(_raster.dtype, np.float32)
+
+class TestRasterWrite(unittest.TestCase):
+    def test_write_keeps_our_dtype(self):
+        import os
+        import tempfile
+        import numpy as np
+        from osgeo import gdal
+        from beatbox.raster import Raster
+        _array = np.linspace(-1, 1, 12, dtype=np.float32).reshape(3, 4)
+        _raster = Raster(array=_array)
+        _raster.geot = (0, 30, 0, 0, 0, -30)
+        with tempfile.TemporaryDirectory() as _dir:
+            _filename = _raster.write(os.path.join(_dir, 'out.tif'))
+            np.testing.assert_array_equal(
+                gdal.Open(_filename).ReadAsArray(), _array)
+
+class TestRasterDiscCaching(unittest.TestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        import numpy as np
+        self._cwd = os.getcwd()
+        self._dir = tempfile.TemporaryDirectory()
+        # our caches are written to the working directory
+        os.chdir(self._dir.name)
+        self._array = np.arange(48 * 40, dtype=np.int16).reshape(48, 40)
+        self._filename = _write_test_geotiff('test.tif', self._array)
+
+    def tearDown(self):
+        import os
+        os.chdir(self._cwd)
+        self._dir.cleanup()
+
+    def test_cache_reuse_and_cleanup(self):
+        import os
+        import numpy as np
+        from beatbox.raster import Raster, _DISC_CACHE_REFS
+        _first = Raster(self._filename, dtype=np.int16, disc_caching=True)
+        _cache = _first._using_disc_caching
+        self.assertTrue(os.path.exists(_cache))
+        _second = Raster(self._filename, dtype=np.int16, disc_caching=True)
+        self.assertEqual(_second._using_disc_caching, _cache)
+        self.assertEqual(_DISC_CACHE_REFS[_cache], 2)
+        np.testing.assert_array_equal(_second.data, self._array)
+        # writes to one Raster don't leak into the cache (or the other)
+        _first.data[0, 0] = -1
+        self.assertEqual(_second.data[0, 0], self._array[0, 0])
+        self.assertEqual(np.load(_cache)[0, 0], self._array[0, 0])
+        del _first
+        self.assertTrue(os.path.exists(_cache))
+        self.assertEqual(_DISC_CACHE_REFS[_cache], 1)
+        del _second
+        self.assertFalse(os.path.exists(_cache))
+        self.assertNotIn(_cache, _DISC_CACHE_REFS)
+
+    def test_ignores_partial_caches(self):
+        import os
+        import numpy as np
+        from beatbox.raster import Raster
+        _raster = Raster(self._filename, dtype=np.int16, disc_caching=True)
+        # no temporary (partially-filled) caches left behind
+        self.assertEqual(
+            [f for f in os.listdir('.') if f.endswith('.tmp')], [])
+        np.testing.assert_array_equal(_raster.data, self._array)
+
+    def test_shared_handle_requires_a_cache(self):
+        import numpy as np
+        from beatbox.raster import Raster
+        # disc_caching=True without a file never creates a cache
+        with self.assertRaises(AttributeError):
+            Raster(array=self._array, disc_caching=True).shared_handle()
+        _raster = Raster(self._filename, dtype=np.int16, disc_caching=True)
+        _handle = _raster.shared_handle()
+        self.assertEqual(_handle['path'], _raster._using_disc_caching)
+        self.assertEqual(_handle['shape'], self._array.shape)
+
+class TestMovingWindows(unittest.TestCase):
+    def _reference(self, image=None, function=None, footprint=None):
+        import numpy as np
+        from scipy import ndimage
+        # ndimage's 'reflect' mode is numpy's 'symmetric' padding
+        return ndimage.generic_filter(image.astype(np.float64), function,
+                                      footprint=footprint, mode='reflect')
+
+    def test_filter_matches_ndimage(self):
+        import numpy as np
+        _mw = _moving_windows()
+        _image = np.random.default_rng(0).integers(0, 5, (45, 38))
+        for function in (np.sum, np.mean, np.std, np.median):
+            for size in (3, 7, 11):
+                np.testing.assert_allclose(
+                    _mw.filter(_image, function=function, size=size,
+                               write=False, dtype=np.float64),
+                    self._reference(_image, function,
+                                    _mw._circular_footprint(size)),
+                    rtol=1e-6, atol=1e-6)
+
+    def test_window_sum_prefix_sums(self):
+        import numpy as np
+        from scipy import ndimage
+        _mw = _moving_windows()
+        _image = np.random.default_rng(1).integers(0, 5, (80, 70))
+        # circular and ragged footprints are summed from row prefix sums
+        for footprint in (_mw._circular_footprint(9),
+                          np.array([[1, 0, 1], [1, 1, 1], [0, 0, 1]])):
+            np.testing.assert_allclose(
+                _mw._window_sum(_image, np.asarray(footprint)),
+                ndimage.correlate(_image.astype(np.float64),
+                                  np.asarray(footprint, dtype=np.float64),
+                                  mode='reflect'),
+                rtol=1e-9, atol=1e-6)
+
+    def test_rectangular_footprints(self):
+        import numpy as np
+        from scipy import ndimage
+        _mw = _moving_windows()
+        _image = np.random.default_rng(5).integers(0, 5, (45, 38))
+        # rectangular footprints are summed from a summed-area table
+        np.testing.assert_allclose(
+            _mw._window_sum(_image, np.ones((6, 4))),
+            ndimage.correlate(_image.astype(np.float64), np.ones((6, 4)),
+                              mode='reflect'),
+            rtol=1e-9, atol=1e-6)
+        for function in (np.sum, np.mean, np.std):
+            np.testing.assert_allclose(
+                _mw.filter(_image, function=function,
+                           footprint=np.ones((5, 7)), write=False,
+                           dtype=np.float64),
+                self._reference(_image, function, np.ones((5, 7))),
+                rtol=1e-6, atol=1e-6)
+
+    def test_window_sum_fft(self):
+        import numpy as np
+        from scipy import ndimage
+        _mw = _moving_windows()
+        _image = np.random.default_rng(6).integers(0, 5, (80, 70))
+        _footprint = _mw._circular_footprint(_mw._FFT_MIN_SIZE)
+        np.testing.assert_allclose(
+            _mw._window_sum(_image, _footprint),
+            ndimage.correlate(_image.astype(np.float64),
+                              _footprint.astype(np.float64), mode='reflect'),
+            rtol=1e-9, atol=1e-6)
+
+    def test_filter_sizes_matches_filter(self):
+        import numpy as np
+        _mw = _moving_windows()
+        _image = np.random.default_rng(2).integers(0, 5, (40, 33))
+        for function in (np.sum, np.mean, np.std, np.max):
+            for size, result in _mw.filter_sizes(_image, function=function,
+                                                 sizes=[3, 7, 11],
+                                                 dtype=np.float64):
+                np.testing.assert_allclose(
+                    result, _mw.filter(_image, function=function, size=size,
+                                       write=False, dtype=np.float64),
+                    rtol=1e-6, atol=1e-6)
+
+    def test_user_functions(self):
+        import numpy as np
+        _mw = _moving_windows()
+        _image = np.random.default_rng(7).random((30, 25))
+        _footprint = _mw._circular_footprint(5)
+        # np.ptp takes axis= (strided view), the lambda doesn't
+        # (generic_filter) -- both should agree with ndimage
+        for function in (np.ptp, lambda values: np.ptp(values)):
+            np.testing.assert_allclose(
+                _mw.filter(_image, function=function, size=5, write=False,
+                           dtype=np.float64),
+                self._reference(_image, function, _footprint),
+                rtol=1e-9, atol=1e-9)
+
+        def _broken(values, axis=None):
+            raise TypeError("broken")
+        # errors raised by an axis= function aren't retried elsewhere
+        with self.assertRaises(TypeError):
+            _mw.filter(_image, function=_broken, size=3, write=False)
+
+class TestFilterFile(unittest.TestCase):
+    def test_filter_file_matches_filter(self):
+        import os
+        import tempfile
+        import numpy as np
+        from osgeo import gdal
+        from beatbox.moving_windows import filter, filter_file
+        from beatbox.raster import _local_binary_reclassify
+        _image = np.random.default_rng(3).integers(0, 5, (70, 45)) \
+            .astype(np.uint16)
+        _sizes = [3, 7, 11]
+        with tempfile.TemporaryDirectory() as _dir:
+            _src = _write_test_geotiff(os.path.join(_dir, 'src.tif'),
+                                       _image, block_shape=(16, 16))
+            # strips and tiles smaller than, equal to, and larger than
+            # our halo and our raster
+            for strip_bytes, tile_bytes in ((1, 1), (45 * 2 * 10, 45 * 8 * 3),
+                                            (10 ** 8, 10 ** 8)):
+                for function, match in ((np.sum, None), (np.mean, None),
+                                        (np.sum, [1, 3]), (np.max, [2])):
+                    _filenames = filter_file(
+                        _src, os.path.join(_dir, 'out'), function, _sizes,
+                        match=match, strip_bytes=strip_bytes,
+                        tile_bytes=tile_bytes)
+                    _base = _image if match is None else \
+                        _local_binary_reclassify(_image, match)
+                    for size, filename in zip(_sizes, _filenames):
+                        _expected = filter(_base, function=function,
+                                           size=size, write=False,
+                                           dtype=np.float64)
+                        np.testing.assert_allclose(
+                            gdal.Open(filename).ReadAsArray(), _expected,
+                            rtol=1e-5, atol=1e-4)
+
+    def test_filter_file_stacked_classes(self):
+        import os
+        import tempfile
+        import numpy as np
+        from osgeo import gdal
+        from beatbox.moving_windows import filter, filter_file
+        from beatbox.raster import _local_binary_reclassify
+        _image = np.random.default_rng(4).integers(0, 5, (50, 40)) \
+            .astype(np.uint8)
+        _classes = {'a': [1, 3], 'b': [2]}
+        with tempfile.TemporaryDirectory() as _dir:
+            _src = _write_test_geotiff(os.path.join(_dir, 'src.tif'), _image)
+            _filenames = filter_file(_src, os.path.join(_dir, 'out'),
+                                     np.sum, [3, 7], match=_classes,
+                                     strip_bytes=40 * 20)
+            self.assertEqual(len(_filenames), 4)
+            for name, match in _classes.items():
+                for size in (3, 7):
+                    _filename = os.path.join(
+                        _dir, 'out_%s_%dx%d.tif' % (name, size, size))
+                    self.assertIn(_filename, _filenames)
+                    np.testing.assert_array_equal(
+                        gdal.Open(_filename).ReadAsArray(),
+                        filter(_local_binary_reclassify(_image, match),
+                               function=np.sum, size=size, write=False,
+                               dtype=np.float64))
+
 if __name__ == '__main__':
     unittest.main()